@@ -0,0 +1,152 @@
+"""
+Streaming batch analysis of recorded positions.
+
+    python analyze.py positions.jsonl --depth 8 --output scores.jsonl
+    cat games.txt | python analyze.py - --rows 6 --cols 7
+
+Input lines are either JSON objects like the requests of server.py
+    {"id": "g17", "moves": "4453", "rows": 6, "cols": 7, "depth": 10}
+(everything but "moves" optional, defaulting to the command line) or bare
+move strings as written by the tournament runner. Blank lines and lines
+starting with # are skipped.
+
+Each position gets one output line, in input order:
+    {"line": 3, "id": "g17", "moves": "4453", "scores": [...], "col": 3}
+"scores" holds one score per column from RED's point of view, null for a
+full column, and "col" is the 0-based best move for the side to move.
+Positions that cannot be analysed get an "error" instead.
+
+Positions are read, searched and written one chunk at a time through a
+chain of generators, with at most --in-flight chunks queued on the
+process pool, so memory does not grow with the size of the corpus. Pool
+workers live for the whole run and keep their transposition tables, so
+positions sharing an opening reuse each other's work. Progress goes to
+stderr.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from itertools import islice
+import minimax
+from parallel import get_pool
+from position import Position
+from server import RequestError, parse_request
+from utility import ROWS, COLS, AI_PLAYER1_DEPTH
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+
+def read_records(lines, rows, cols, depth):
+    """Parse input lines into (line number, record) pairs; a record is a dict or an error string."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield number, f"invalid JSON: {error}"
+                continue
+            if not isinstance(record, dict):
+                yield number, "expected a JSON object"
+                continue
+        else:
+            record = {"moves": line}
+        request = {"rows": rows, "cols": cols, "depth": depth}
+        request.update(record, op="scores")
+        try:
+            _, moves, record_rows, record_cols, record_depth, _ = parse_request(request)
+        except RequestError as error:
+            yield number, str(error)
+            continue
+        yield number, {"id": record.get("id"), "moves": record.get("moves", ""), "key": moves,
+                       "rows": record_rows, "cols": record_cols, "depth": record_depth}
+
+
+def analyse_chunk(chunk):
+    """Runs in a worker process: scores and best move for each (line number, record) pair."""
+    results = []
+    for number, record in chunk:
+        if isinstance(record, str):
+            results.append({"line": number, "error": record})
+            continue
+        board = Position.from_moves(record["key"], record["rows"], record["cols"])
+        player = board.to_move
+        scores = minimax.column_scores(board, record["depth"], player)
+        result = {"line": number}
+        if record["id"] is not None:
+            result["id"] = record["id"]
+        result["moves"] = record["moves"]
+        result["scores"] = [scores.get(col) for col in range(board.cols)]
+        result["col"] = minimax.pick_best(scores, player, board.geometry.center_order)
+        results.append(result)
+    return results
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyse_stream(records, workers=None, chunk_size=16, in_flight=None):
+    """Yield results for (line number, record) pairs in input order, keeping a bounded number of chunks queued."""
+    pool = get_pool(workers)
+    in_flight = in_flight or 4 * pool._max_workers
+    pending = deque()
+    for chunk in chunks(records, chunk_size):
+        if len(pending) >= in_flight:
+            yield from pending.popleft().result()
+        pending.append(pool.submit(analyse_chunk, chunk))
+    while pending:
+        yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every column of recorded positions",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("input", help="JSONL or move-string file, - for stdin")
+    parser.add_argument("--output", "-o", default="-", help="output JSONL file (default: stdout)")
+    parser.add_argument("--depth", type=int, default=AI_PLAYER1_DEPTH)
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="positions per task sent to a worker")
+    parser.add_argument("--in-flight", type=int, default=None, help="chunks queued at once (default: 4 per worker)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = last_report = time.perf_counter()
+    done = errors = 0
+    try:
+        records = read_records(source, args.rows, args.cols, args.depth)
+        for result in analyse_stream(records, args.workers, args.chunk_size, args.in_flight):
+            sink.write(json.dumps(result) + "\n")
+            done += 1
+            errors += "error" in result
+            now = time.perf_counter()
+            if not args.quiet and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"{done} positions, {done / (now - start):.1f}/s", file=sys.stderr, flush=True)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(f"{done} positions ({errors} errors) in {elapsed:.2f}s: {done / elapsed if elapsed else 0:.1f}/s",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Vectorized evaluation of many positions at once for offline analysis.
+Needs numpy, which the game and the search themselves do not.
+"""
+import numpy as np
+from minimax import evaluate_window, WIN_SCORE
+from utility import RED, YELLOW, EMPTY, window_cells
+
+# evaluate_window(window, RED) for a window holding [red, yellow] pieces
+SCORE_TABLE = np.zeros((5, 5), dtype=np.int32)
+for _red in range(5):
+    for _yellow in range(5 - _red):
+        SCORE_TABLE[_red, _yellow] = evaluate_window([RED] * _red + [YELLOW] * _yellow + [EMPTY] * (4 - _red - _yellow), RED)
+
+CHUNK_SIZE = 65536
+
+_window_index = {}
+
+
+def window_index(rows, cols):
+    """Flat cell indices (row * cols + col) of every window, shape (windows, 4), cached per size."""
+    if (rows, cols) not in _window_index:
+        windows = window_cells(rows, cols)
+        _window_index[(rows, cols)] = np.array([[r * cols + c for r, c in window] for window in windows],
+                                               dtype=np.intp).reshape(len(windows), 4)
+    return _window_index[(rows, cols)]
+
+
+def to_array(boards):
+    """Stack the grids of same-sized board objects into an (N, rows, cols) int8 array."""
+    return np.array([board.grid for board in boards], dtype=np.int8)
+
+
+def evaluate_batch(boards):
+    """
+    Score an (N, rows, cols) int8 array of grids (row 0 on top), giving the
+    same values as minimax.evaluate for each one. Works through the batch in
+    chunks so memory stays bounded for very large inputs.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    count, rows, cols = boards.shape
+    flat = boards.reshape(count, rows * cols)
+    index = window_index(rows, cols)
+    scores = np.empty(count, dtype=np.int32)
+
+    for start in range(0, count, CHUNK_SIZE):
+        chunk = flat[start:start + CHUNK_SIZE]
+        cells = chunk[:, index]
+        red = (cells == RED).sum(axis=2, dtype=np.int8)
+        yellow = (cells == YELLOW).sum(axis=2, dtype=np.int8)
+
+        chunk_scores = SCORE_TABLE[red, yellow].sum(axis=1, dtype=np.int32)
+        chunk_scores[(chunk != EMPTY).all(axis=1)] = 0
+        chunk_scores[(yellow == 4).any(axis=1)] = -WIN_SCORE
+        chunk_scores[(red == 4).any(axis=1)] = WIN_SCORE
+        scores[start:start + len(chunk)] = chunk_scores
+
+    return scores
@@ -0,0 +1,223 @@
+"""
+Benchmarks for the engine hot paths over a fixed corpus of positions.
+
+    python bench.py --output report.json
+    python bench.py --save-baseline baseline.json
+    python bench.py --baseline baseline.json --threshold 0.10
+    python bench.py --strategies 8
+
+Every benchmark reports a throughput (ops/sec, and nodes/sec for searches),
+so higher is always better. With --baseline, any result that dropped more
+than --threshold (a fraction) below the baseline is reported as a
+regression and the exit status is 1.
+
+--strategies DEPTH instead prints the nodes and time each search strategy
+needs at that depth, next to plain minimax without pruning. It exits with
+status 1 if any strategy picks a different move from plain minimax.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import minimax
+from position import Position
+from utility import RED, YELLOW, string_to_moves
+
+# Move strings on the default 5x4 board, none of them finished games
+CORPUS = {
+    "opening": ["", "3", "32", "3324", "4253"],
+    "midgame": ["332415", "33241512", "3324151244", "24352413", "24352413315"],
+    "endgame": ["332415124453", "33241512445311", "3324151244531125", "332415124453112552"],
+}
+
+SEARCH_DEPTHS = (2, 4, 6, 8)
+
+
+def corpus_positions(phases=CORPUS):
+    return [Position.from_moves(string_to_moves(moves)) for phase in phases.values() for moves in phase]
+
+
+def measure(run, min_time, repeat):
+    """
+    Call run() (which returns the number of operations it did) until
+    min_time seconds have passed. Return the best ops/sec of `repeat` rounds.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            ops += run()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, ops / elapsed)
+    return best
+
+
+def bench_check_win(positions):
+    def run():
+        for position in positions:
+            position.check_win(RED)
+            position.check_win(YELLOW)
+        return 2 * len(positions)
+    return run
+
+
+def bench_make_undo(positions):
+    moves = [(position, position.valid_moves(), position.to_move) for position in positions]
+
+    def run():
+        ops = 0
+        for position, valid, player in moves:
+            for col in valid:
+                position.make_move(col, player)
+                position.undo_move(col)
+            ops += len(valid)
+        return ops
+    return run
+
+
+def bench_copy(positions):
+    def run():
+        for position in positions:
+            position.copy()
+        return len(positions)
+    return run
+
+
+def bench_evaluate(positions):
+    def run():
+        for position in positions:
+            minimax.evaluate(position)
+        return len(positions)
+    return run
+
+
+def bench_best_move(positions, depth, repeat):
+    """Cold-cache best_move at a fixed depth: (calls/sec, nodes/sec)."""
+    best_calls, best_nodes = 0.0, 0.0
+    for _ in range(repeat):
+        nodes = 0
+        start = time.perf_counter()
+        for position in positions:
+            minimax.clear_cache()
+            before = minimax.node_count
+            minimax.best_move(position, depth, position.to_move, use_database=False)
+            nodes += minimax.node_count - before
+        elapsed = time.perf_counter() - start
+        best_calls = max(best_calls, len(positions) / elapsed)
+        best_nodes = max(best_nodes, nodes / elapsed)
+    return best_calls, best_nodes
+
+
+def compare_strategies(positions, depth):
+    """
+    Search every position at `depth` with plain minimax and each strategy.
+    Returns [(name, nodes, seconds, moves matching plain minimax)].
+    """
+    reference = []
+    before = minimax.node_count
+    start = time.perf_counter()
+    for position in positions:
+        reference.append(minimax.best_move(position, depth, position.to_move, pruning=False))
+    rows = [("plain", minimax.node_count - before, time.perf_counter() - start, len(positions))]
+
+    for strategy in minimax.STRATEGIES:
+        nodes, seconds, same = 0, 0.0, 0
+        for position, expected in zip(positions, reference):
+            minimax.clear_cache()
+            before = minimax.node_count
+            start = time.perf_counter()
+            col = minimax.best_move(position, depth, position.to_move, use_database=False, strategy=strategy)
+            seconds += time.perf_counter() - start
+            nodes += minimax.node_count - before
+            same += col == expected
+        rows.append((strategy, nodes, seconds, same))
+    return rows
+
+
+def run_benchmarks(min_time=0.2, repeat=3, depths=SEARCH_DEPTHS):
+    positions = corpus_positions()
+    results = {
+        "check_win": {"ops_per_sec": measure(bench_check_win(positions), min_time, repeat)},
+        "make_undo_move": {"ops_per_sec": measure(bench_make_undo(positions), min_time, repeat)},
+        "copy": {"ops_per_sec": measure(bench_copy(positions), min_time, repeat)},
+        "evaluate": {"ops_per_sec": measure(bench_evaluate(positions), min_time, repeat)},
+    }
+    for depth in depths:
+        calls, nodes = bench_best_move(positions, depth, repeat)
+        results[f"best_move_depth_{depth}"] = {"ops_per_sec": calls, "nodes_per_sec": nodes}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "positions": len(positions),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Return a list of (benchmark, metric, baseline value, current value) that regressed."""
+    regressions = []
+    for name, metrics in baseline["results"].items():
+        current = report["results"].get(name)
+        if current is None:
+            continue
+        for metric, old in metrics.items():
+            new = current.get(metric)
+            if new is not None and old > 0 and new < old * (1 - threshold):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine hot-path benchmarks",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--save-baseline", help="write the report here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction (default 0.10)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=3, help="timing rounds per benchmark; the best is kept")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(SEARCH_DEPTHS))
+    parser.add_argument("--strategies", type=int, metavar="DEPTH",
+                        help="compare search strategies against plain minimax at this depth")
+    args = parser.parse_args(argv)
+
+    if args.strategies:
+        positions = corpus_positions()
+        rows = compare_strategies(positions, args.strategies)
+        print(f"{'strategy':<10} {'nodes':>12} {'seconds':>9} {'same move':>10}")
+        for name, nodes, seconds, same in rows:
+            print(f"{name:<10} {nodes:>12,} {seconds:>9.3f} {same:>6}/{len(positions)}")
+        return 0 if all(same == len(positions) for *_, same in rows) else 1
+
+    report = run_benchmarks(args.min_time, args.repeat, args.depths)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:,.0f} -> {new:,.0f} ({new / old - 1:+.1%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,90 @@
+import sys
+import time
 import pygame
 from board import Board
-from minimax import best_move
-from utility import RED, YELLOW, AI_PLAYER1, AI_PLAYER2, AI_PLAYER1_DEPTH, AI_PLAYER2_DEPTH
+from game_record import GameRecord, append_game
+from history import MoveHistory
+from mcts import clear_tree
+from minimax import clear_cache, open_persistent_cache
+from renderer import draw_board, render_text, DirtyRegions, BACKGROUND_COLOR, CELL_SIZE
+from search_worker import SearchWorker
+from utility import ROWS, COLS, RED, YELLOW, EMPTY, AI_PLAYER1, AI_PLAYER2, AI_PLAYER1_DEPTH, AI_PLAYER2_DEPTH
+from utility import AI_PLAYER1_TIME_MS, AI_PLAYER2_TIME_MS, AI_PLAYER1_STRATEGY, AI_PLAYER2_STRATEGY, TT_CACHE_FILE
+from utility import GAME_RECORD_FILE
+
+
+# Largest board area in pixels; cells shrink below CELL_SIZE to fit bigger boards
+MAX_BOARD_WIDTH = 900
+MAX_BOARD_HEIGHT = 700
+# Space below the board for messages and buttons, and the narrowest window that fits the buttons
+PANEL_HEIGHT = 170
+MIN_WIDTH = 500
 
 
 class ConnectFour:
-    def __init__(self):
+    def __init__(self, rows=ROWS, cols=COLS, time_ms=None):
+        """time_ms, if given, is a per-move time budget for both players that overrides utility."""
         pygame.init()
-        # Window size: 5 columns x 100px = 500, 4 rows x 100px = 400, plus 150px for buttons/messages
-        self.screen = pygame.display.set_mode((500, 550))
-        pygame.display.set_caption("5x4 Connect Four")
+        self.rows = rows
+        self.cols = cols
+        self.time_ms = time_ms
+        self.layout()
+        self.open_window()
 
         self.font = pygame.font.Font(None, 48)
         self.small_font = pygame.font.Font(None, 24)
-        self.board = Board()
+        self.board = Board(rows, cols)
         self.turn = RED
         self.game_over = False
         self.winner = None
         self.ai_thinking = False
+        self.worker = SearchWorker()
+        clear_cache()
+        clear_tree()
+        if TT_CACHE_FILE:
+            # Reopening on reset also saves what the last game found
+            open_persistent_cache(TT_CACHE_FILE)
 
         # History tracking for previous/next functionality
-        self.history = [self.board.copy()]  # Start with empty board
+        self.history = MoveHistory(rows, cols)  # Columns played; history[i] is the board after i moves
         self.current_state_index = 0
         self.viewing_history = False
+        # Think time (ms) and root score of each move, saved with the game record
+        self.think_ms = []
+        self.scores = []
+
+    def layout(self):
+        """
+        Work out the window size and button positions for the board size.
+        On 5x4 this gives a 500x570 window: a 400px board, then messages,
+        Prev/Show/Next buttons and search statistics in a 170px panel.
+        """
+        self.cell_size = min(CELL_SIZE, MAX_BOARD_WIDTH // self.cols, MAX_BOARD_HEIGHT // self.rows)
+        board_width = self.cols * self.cell_size
+        self.board_height = self.rows * self.cell_size
+        self.width = max(board_width, MIN_WIDTH)
+        self.height = self.board_height + PANEL_HEIGHT
+        self.board_origin = ((self.width - board_width) // 2, 0)
+
+        self.center_x = self.width // 2
+        buttons_y = self.board_height + 60
+        self.prev_button = pygame.Rect(self.center_x - 200, buttons_y, 100, 50)
+        self.show_button = pygame.Rect(self.center_x - 50, buttons_y, 100, 50)
+        self.next_button = pygame.Rect(self.center_x + 100, buttons_y, 100, 50)
+
+    def open_window(self):
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        pygame.display.set_caption(f"{self.cols}x{self.rows} Connect Four")
+        self.regions = DirtyRegions()
 
     def show_tree_visualization(self):
         """Open tree visualization in a separate window"""
         from tree_visualizer import TreeVisualizer
 
+        # The visualizer searches on the same engine state; restart the AI move afterwards
+        self.worker.cancel()
+        self.ai_thinking = False
+
         # Determine the board state being viewed
         board_state = self.history[self.current_state_index]
 
@@ -36,17 +93,178 @@ class ConnectFour:
         if self.current_state_index % 2 == 0:
             eval_player = RED
             depth = AI_PLAYER1_DEPTH
+            time_ms = AI_PLAYER1_TIME_MS
         else:
             eval_player = YELLOW
             depth = AI_PLAYER2_DEPTH
+            time_ms = AI_PLAYER2_TIME_MS
+        if self.time_ms is not None:
+            time_ms = self.time_ms
 
         # Pass board, depth (6), and correct player
-        visualizer = TreeVisualizer(board_state, depth, eval_player)
+        visualizer = TreeVisualizer(board_state, depth, eval_player, time_ms)
         visualizer.run()
 
         # Restore main window
-        self.screen = pygame.display.set_mode((500, 550))
-        pygame.display.set_caption("5x4 Connect Four")
+        self.open_window()
+
+    def apply_move(self, col):
+        """Play the AI's chosen column and update history and game state."""
+        self.board.make_move(col, self.turn)
+        # Save move to history
+        self.history.append(col)
+        self.current_state_index = len(self.history) - 1
+        stats = self.worker.last_stats
+        self.think_ms.append(round(self.worker.last_time * 1000))
+        self.scores.append(stats.score if stats is not None else None)
+
+        # Check for win
+        if self.board.check_win(self.turn):
+            self.game_over = True
+            self.winner = self.turn
+        elif self.board.is_full():
+            self.game_over = True
+            self.winner = None  # Draw
+        else:
+            # Switch turns
+            self.turn = YELLOW if self.turn == RED else RED
+        if self.game_over and GAME_RECORD_FILE:
+            self.save_game(GAME_RECORD_FILE)
+
+    def engine_settings(self, player):
+        """(depth, time_ms, strategy) the engine plays with for player."""
+        if player == AI_PLAYER1:
+            depth, time_ms, strategy = AI_PLAYER1_DEPTH, AI_PLAYER1_TIME_MS, AI_PLAYER1_STRATEGY
+        else:
+            depth, time_ms, strategy = AI_PLAYER2_DEPTH, AI_PLAYER2_TIME_MS, AI_PLAYER2_STRATEGY
+        if self.time_ms is not None:
+            time_ms = self.time_ms
+        return depth, time_ms, strategy
+
+    def save_game(self, path):
+        """Append the game to a game record file, with engine settings, think times and scores."""
+        meta = {"think_ms": self.think_ms, "scores": self.scores, "ended": int(time.time())}
+        for name, player in (("red", RED), ("yellow", YELLOW)):
+            depth, time_ms, strategy = self.engine_settings(player)
+            meta[name] = {"depth": depth, "time_ms": time_ms, "strategy": strategy}
+        try:
+            record = GameRecord.from_moves(self.rows, self.cols, self.history.to_list(), self.winner or EMPTY, meta)
+            append_game(path, record)
+        except (OSError, ValueError) as error:
+            # Losing the record is no reason to stop the game
+            print(f"Could not save the game to {path}: {error}", file=sys.stderr)
+
+    def load_game(self, record):
+        """
+        Show a recorded game: the history holds its moves and the view
+        starts at the empty board, to step through with Prev/Next.
+        """
+        if (record.rows, record.cols) != (self.rows, self.cols):
+            raise ValueError(f"record is a {record.cols}x{record.rows} game, the window is {self.cols}x{self.rows}")
+        self.worker.cancel()
+        self.ai_thinking = False
+        self.board = Board(self.rows, self.cols)
+        self.history = MoveHistory(self.rows, self.cols)
+        self.turn = RED
+        for col in record.moves:
+            self.board.make_move(col, self.turn)
+            self.history.append(col)
+            self.turn = YELLOW if self.turn == RED else RED
+        self.think_ms = record.meta.get("think_ms", [])
+        self.scores = record.meta.get("scores", [])
+        # Finished as recorded; the engine does not play on
+        self.game_over = True
+        self.winner = record.result or None
+        self.current_state_index = 0
+        self.viewing_history = True
+
+    def stats_line(self):
+        """One-line summary of the last engine search: nodes, time and nodes/sec."""
+        stats, seconds = self.worker.last_stats, self.worker.last_time
+        if seconds is None:
+            return None
+        if stats is None:
+            return f"Last move: {seconds:.2f}s"
+        if stats.from_database:
+            return f"Last move: database, {seconds:.2f}s"
+        return (f"Last move: depth {stats.depth}, {stats.nodes:,} nodes, {seconds:.2f}s, "
+                f"{stats.nodes_per_second:,.0f} n/s")
+
+    def draw(self):
+        """
+        Redraw the parts of the window whose content changed since the last
+        frame and return their rects. The window is split into the board,
+        the message line, the buttons and the footer (move counter and
+        search statistics); an idle frame draws nothing.
+        """
+        dirty = []
+        panel_top = self.board_height
+
+        # Draw the board state (current or from history)
+        board_to_draw = self.history[self.current_state_index] if self.viewing_history else self.board
+        if self.regions.changed("board", (board_to_draw.red, board_to_draw.yellow)):
+            rect = pygame.Rect(0, 0, self.width, self.board_height)
+            self.screen.fill(BACKGROUND_COLOR, rect)
+            draw_board(self.screen, board_to_draw, self.cell_size, self.board_origin)
+            dirty.append(rect)
+
+        # Thinking indicator while the engine searches, or the game over message
+        thinking = None
+        if self.ai_thinking and not self.viewing_history:
+            name = "Red" if self.turn == RED else "Yellow"
+            thinking = f"{name} thinking... {self.worker.elapsed():.1f}s"
+        finished = self.game_over and self.current_state_index == len(self.history) - 1
+        if self.regions.changed("message", (thinking, finished, self.winner)):
+            rect = pygame.Rect(0, panel_top, self.width, 56)
+            self.screen.fill(BACKGROUND_COLOR, rect)
+            if thinking:
+                thinking_text = render_text(self.small_font, thinking, (150, 150, 150))
+                self.screen.blit(thinking_text, thinking_text.get_rect(center=(self.center_x, panel_top + 30)))
+            if finished:
+                if self.winner == RED:
+                    text = render_text(self.font, "RED WINS!", (255, 100, 100))
+                elif self.winner == YELLOW:
+                    text = render_text(self.font, "YELLOW WINS!", (255, 255, 100))
+                else:
+                    text = render_text(self.font, "DRAW!", (200, 200, 200))
+                self.screen.blit(text, text.get_rect(center=(self.center_x, panel_top + 20)))
+
+                # Show reset instruction
+                reset_text = render_text(self.small_font, "Press R to restart", (150, 150, 150))
+                self.screen.blit(reset_text, reset_text.get_rect(center=(self.center_x, panel_top + 45)))
+            dirty.append(rect)
+
+        # Previous/Show/Next buttons, greyed out when there is nowhere to go
+        has_prev = self.current_state_index > 0
+        has_next = self.current_state_index < len(self.history) - 1
+        if self.regions.changed("buttons", (has_prev, has_next)):
+            rect = pygame.Rect(0, panel_top + 56, self.width, 58)
+            self.screen.fill(BACKGROUND_COLOR, rect)
+            for button, label, color in (
+                (self.prev_button, "< Prev", (70, 70, 70) if has_prev else (40, 40, 40)),
+                (self.show_button, "Show", (50, 100, 150)),
+                (self.next_button, "Next >", (70, 70, 70) if has_next else (40, 40, 40)),
+            ):
+                pygame.draw.rect(self.screen, color, button)
+                pygame.draw.rect(self.screen, (150, 150, 150), button, 2)
+                text = render_text(self.small_font, label, (200, 200, 200))
+                self.screen.blit(text, text.get_rect(center=button.center))
+            dirty.append(rect)
+
+        # Move counter and search statistics of the last engine move
+        move_line = f"Move: {self.current_state_index}/{len(self.history) - 1}"
+        stats_line = self.stats_line()
+        if self.regions.changed("footer", (move_line, stats_line)):
+            rect = pygame.Rect(0, panel_top + 114, self.width, self.height - panel_top - 114)
+            self.screen.fill(BACKGROUND_COLOR, rect)
+            move_text = render_text(self.small_font, move_line, (150, 150, 150))
+            self.screen.blit(move_text, move_text.get_rect(center=(self.center_x, panel_top + 120)))
+            if stats_line:
+                stats_text = render_text(self.small_font, stats_line, (120, 120, 120))
+                self.screen.blit(stats_text, stats_text.get_rect(center=(self.center_x, panel_top + 148)))
+            dirty.append(rect)
+
+        return dirty
 
     def run(self):
         clock = pygame.time.Clock()
@@ -56,110 +274,43 @@ class ConnectFour:
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.worker.cancel()
                     return
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.regions.invalidate()
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r and self.game_over:
-                        self.__init__()  # Reset game
+                    if event.key == pygame.K_r:
+                        self.worker.cancel()
+                        self.__init__(self.rows, self.cols, self.time_ms)  # Reset game
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = event.pos
                     # Check if previous button clicked (left side)
-                    if 50 <= mouse_x <= 150 and 460 <= mouse_y <= 510:
+                    if self.prev_button.collidepoint(event.pos):
                         if self.current_state_index > 0:
                             self.current_state_index -= 1
                             self.viewing_history = True
                     # Check if show button clicked (middle)
-                    elif 200 <= mouse_x <= 300 and 460 <= mouse_y <= 510:
+                    elif self.show_button.collidepoint(event.pos):
                         self.show_tree_visualization()
                     # Check if next button clicked (right side)
-                    elif 350 <= mouse_x <= 450 and 460 <= mouse_y <= 510:
+                    elif self.next_button.collidepoint(event.pos):
                         if self.current_state_index < len(self.history) - 1:
                             self.current_state_index += 1
                             self.viewing_history = self.current_state_index < len(self.history) - 1
 
             # Only progress game if not viewing history and game not over
-            if not self.game_over and not self.ai_thinking and not self.viewing_history:
-                self.ai_thinking = True
+            if not self.game_over and not self.viewing_history:
+                if not self.ai_thinking:
+                    self.ai_thinking = True
 
-                # Determine which depth to use based on current player
-                if self.turn == AI_PLAYER1:
-                    depth = AI_PLAYER1_DEPTH
-                else:
-                    depth = AI_PLAYER2_DEPTH
-
-                col = best_move(self.board, depth, self.turn)
-
-                if col is not None:
-                    self.board.make_move(col, self.turn)
-                    # Save state to history
-                    self.history.append(self.board.copy())
-                    self.current_state_index = len(self.history) - 1
-
-                    # Check for win
-                    if self.board.check_win(self.turn):
-                        self.game_over = True
-                        self.winner = self.turn
-                    elif self.board.is_full():
-                        self.game_over = True
-                        self.winner = None  # Draw
-                    else:
-                        # Switch turns
-                        self.turn = YELLOW if self.turn == RED else RED
-
-                self.ai_thinking = False
-
-            # Draw everything
-            self.screen.fill((25, 25, 25))
-
-            # Draw the board state (current or from history)
-            board_to_draw = self.history[self.current_state_index] if self.viewing_history else self.board
-            board_to_draw.draw(self.screen)
-
-            # Draw game over message
-            if self.game_over and self.current_state_index == len(self.history) - 1:
-                if self.winner == RED:
-                    text = self.font.render("RED WINS!", True, (255, 100, 100))
-                elif self.winner == YELLOW:
-                    text = self.font.render("YELLOW WINS!", True, (255, 255, 100))
+                    # Determine which depth to use based on current player
+                    depth, time_ms, strategy = self.engine_settings(self.turn)
+                    self.worker.start(self.board, depth, self.turn, time_ms, strategy)
                 else:
-                    text = self.font.render("DRAW!", True, (200, 200, 200))
+                    col = self.worker.poll()
+                    if col is not None:
+                        self.ai_thinking = False
+                        self.apply_move(col)
 
-                text_rect = text.get_rect(center=(250, 420))
-                self.screen.blit(text, text_rect)
-
-                # Show reset instruction
-                reset_text = self.small_font.render("Press R to restart", True, (150, 150, 150))
-                reset_rect = reset_text.get_rect(center=(250, 445))
-                self.screen.blit(reset_text, reset_rect)
-
-            # Draw Previous/Show/Next buttons
-            # Previous button
-            prev_color = (70, 70, 70) if self.current_state_index > 0 else (40, 40, 40)
-            pygame.draw.rect(self.screen, prev_color, (50, 460, 100, 50))
-            pygame.draw.rect(self.screen, (150, 150, 150), (50, 460, 100, 50), 2)
-            prev_text = self.small_font.render("< Prev", True, (200, 200, 200))
-            prev_rect = prev_text.get_rect(center=(100, 485))
-            self.screen.blit(prev_text, prev_rect)
-
-            # Show button (middle)
-            show_color = (50, 100, 150)
-            pygame.draw.rect(self.screen, show_color, (200, 460, 100, 50))
-            pygame.draw.rect(self.screen, (150, 150, 150), (200, 460, 100, 50), 2)
-            show_text = self.small_font.render("Show", True, (200, 200, 200))
-            show_rect = show_text.get_rect(center=(250, 485))
-            self.screen.blit(show_text, show_rect)
-
-            # Next button
-            next_color = (70, 70, 70) if self.current_state_index < len(self.history) - 1 else (40, 40, 40)
-            pygame.draw.rect(self.screen, next_color, (350, 460, 100, 50))
-            pygame.draw.rect(self.screen, (150, 150, 150), (350, 460, 100, 50), 2)
-            next_text = self.small_font.render("Next >", True, (200, 200, 200))
-            next_rect = next_text.get_rect(center=(400, 485))
-            self.screen.blit(next_text, next_rect)
-
-            # Show move counter
-            move_text = self.small_font.render(f"Move: {self.current_state_index}/{len(self.history) - 1}", True,
-                                               (150, 150, 150))
-            move_rect = move_text.get_rect(center=(250, 520))
-            self.screen.blit(move_text, move_rect)
-
-            pygame.display.update()
\ No newline at end of file
+            dirty = self.draw()
+            if dirty:
+                pygame.display.update(dirty)
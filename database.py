@@ -0,0 +1,203 @@
+"""
+Precomputed perfect-play database.
+
+solve() enumerates every reachable non-terminal position of a small board
+and stores its exact game-theoretic value and best move. Mirrored
+positions are folded together. write_database() saves the entries as a
+compact binary file. PerfectPlayDatabase opens that file with mmap and
+answers lookups without loading it into memory.
+
+Build the 5x4 database offline with: python database.py
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from position import Position
+from utility import ROWS, COLS, RED, PERFECT_PLAY_DB
+
+MAGIC = b"C4DB"
+VERSION = 1
+# magic, version, rows, cols, bucket bits, entry count
+HEADER = struct.Struct("<4sHBBBxQ")
+KEY = struct.Struct("<Q")
+OFFSET = struct.Struct("<I")
+NO_MOVE = 255
+
+
+def position_key(position):
+    """Unique integer for the pieces on the board (side to move follows from the piece count)."""
+    return position.red | (position.yellow << (position.cols * position.geometry.height))
+
+
+def canonical_key(position):
+    """(key, mirrored) for the smaller of the position and its left-right mirror."""
+    geo = position.geometry
+    key = position_key(position)
+    mirror_key = geo.mirror(position.red) | (geo.mirror(position.yellow) << (geo.cols * geo.height))
+    if mirror_key < key:
+        return mirror_key, True
+    return key, False
+
+
+def _bucket(key, bucket_bits):
+    return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - bucket_bits)
+
+
+def solve(rows=ROWS, cols=COLS):
+    """
+    Exact negamax over every reachable position. Returns {canonical key:
+    (value, best move)}, where the best move is in canonical orientation
+    and value is from the side to move's point of view. A win is worth
+    size + 1 - (plies at the end of the game), so faster wins score higher
+    and slower losses score less negative; a draw is 0. Ties between
+    moves go to the most central column.
+    """
+    position = Position(rows, cols)
+    size = position.geometry.size
+    order = position.geometry.center_order
+    table = {}
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), size * 4 + 100))
+
+    def negamax(player):
+        key, mirrored = canonical_key(position)
+        if key in table:
+            return table[key][0]
+
+        best_value, best_col = None, None
+        for col in order:
+            if position.make_move(col, player) is None:
+                continue
+            if position.check_win(player):
+                value = size + 1 - position.moves
+            elif position.is_full():
+                value = 0
+            else:
+                value = -negamax(-player)
+            position.undo_move(col)
+            if best_value is None or value > best_value:
+                best_value, best_col = value, col
+
+        table[key] = (best_value, cols - 1 - best_col if mirrored else best_col)
+        return best_value
+
+    negamax(RED)
+    return table
+
+
+def write_database(path, table, rows=ROWS, cols=COLS):
+    """
+    Write solved entries to `path`. Layout after the header: a bucket
+    directory of uint32 start indices, then uint64 keys sorted by (bucket,
+    key), then one int8 value and one uint8 move per entry.
+    """
+    count = len(table)
+    bucket_bits = max(1, min(24, (count // 8).bit_length()))
+    keys = sorted(table, key=lambda key: (_bucket(key, bucket_bits), key))
+
+    offsets = [0] * ((1 << bucket_bits) + 1)
+    for key in keys:
+        offsets[_bucket(key, bucket_bits) + 1] += 1
+    for i in range(1, len(offsets)):
+        offsets[i] += offsets[i - 1]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, bucket_bits, count))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(struct.pack(f"<{count}Q", *keys))
+        f.write(struct.pack(f"<{count}b", *(table[key][0] for key in keys)))
+        f.write(bytes(table[key][1] if table[key][1] is not None else NO_MOVE for key in keys))
+    os.replace(tmp_path, path)
+
+
+class PerfectPlayDatabase:
+    """Read-only, memory-mapped view of a database file written by write_database."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.bucket_bits, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} perfect-play database")
+        self.offsets_at = HEADER.size
+        self.keys_at = self.offsets_at + OFFSET.size * ((1 << self.bucket_bits) + 1)
+        self.values_at = self.keys_at + KEY.size * self.count
+        self.moves_at = self.values_at + self.count
+
+    def close(self):
+        self.map.close()
+
+    def _find(self, key):
+        bucket = _bucket(key, self.bucket_bits)
+        lo, hi = struct.unpack_from("<II", self.map, self.offsets_at + OFFSET.size * bucket)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = KEY.unpack_from(self.map, self.keys_at + KEY.size * mid)[0]
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def lookup(self, position):
+        """(value for the side to move, best column) for a stored position, or None."""
+        if position.rows != self.rows or position.cols != self.cols:
+            return None
+        key, mirrored = canonical_key(position)
+        i = self._find(key)
+        if i < 0:
+            return None
+        value = struct.unpack_from("<b", self.map, self.values_at + i)[0]
+        col = self.map[self.moves_at + i]
+        if col == NO_MOVE:
+            return value, None
+        return value, self.cols - 1 - col if mirrored else col
+
+
+_database = None
+_database_checked = False
+
+
+def open_database(path=PERFECT_PLAY_DB):
+    """Shared database from `path`, or None if it has not been built."""
+    global _database, _database_checked
+    if not _database_checked:
+        _database_checked = True
+        if path and os.path.exists(path):
+            _database = PerfectPlayDatabase(path)
+    return _database
+
+
+def lookup_best_move(position, player=None):
+    """
+    Perfect-play column for the position if the database covers it, else
+    None. The database only knows the side to move by the piece count, so
+    asking for player when it is not their turn also gives None.
+    """
+    if player is not None and player != position.to_move:
+        return None
+    database = open_database()
+    if database is None:
+        return None
+    entry = database.lookup(position)
+    return entry[1] if entry is not None else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the perfect-play database")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--output", default=PERFECT_PLAY_DB)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    solved = solve(args.rows, args.cols)
+    print(f"solved {len(solved)} positions in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_database(args.output, solved, args.rows, args.cols)
+    print(f"wrote {args.output} ({os.path.getsize(args.output)} bytes)", file=sys.stderr)
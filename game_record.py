@@ -0,0 +1,236 @@
+"""
+Compact game records.
+
+A game file starts with a short header and holds any number of records
+appended one after another, so a file grows for as long as games are
+played and is read back in one streaming pass. Each record is
+
+    rows, cols, plies, result, metadata length   (7 bytes)
+    the columns played, one nibble per ply        ((plies + 1) // 2 bytes)
+    metadata as UTF-8 JSON                         (often empty)
+
+Boards wider than NIBBLE_COLS columns store one byte per ply instead.
+
+The result is RED, YELLOW or EMPTY for a draw. Metadata is free-form;
+ConnectFour stores the engine settings of both players, the think time
+in milliseconds and root score of each move, and when the game ended.
+Records decode it only when it is asked for, so statistics over moves
+and results never parse JSON.
+
+    python game_record.py stats data/games.c4g --opening-plies 2
+    python game_record.py export --positions data/games.c4g | python analyze.py -
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import deque
+from utility import RED, YELLOW, EMPTY, MOVE_CHARS, moves_to_string
+
+MAGIC = b"C4GR"
+VERSION = 1
+# magic, format version
+FILE_HEADER = struct.Struct("<4sH")
+# rows, cols, plies, result, metadata length
+RECORD = struct.Struct("<BBHbH")
+
+# Widest board with moves packed one nibble per ply
+NIBBLE_COLS = 16
+# Largest board recorded, so every game can be exported and summarised as a move string
+MAX_SIZE = len(MOVE_CHARS)
+# The two columns packed in each byte, low nibble first
+_NIBBLES = [(byte & 0x0F, byte >> 4) for byte in range(256)]
+
+
+def moves_size(cols, plies):
+    """Bytes taken by the moves of a record."""
+    return (plies + 1) // 2 if cols <= NIBBLE_COLS else plies
+
+
+def pack_moves(moves, cols=NIBBLE_COLS):
+    """0-based columns packed two per byte, low nibble first, or one per byte on boards wider than NIBBLE_COLS."""
+    if cols > NIBBLE_COLS:
+        return bytes(moves)
+    moves = list(moves)
+    if len(moves) % 2:
+        moves.append(0)
+    return bytes(low | high << 4 for low, high in zip(moves[::2], moves[1::2]))
+
+
+def unpack_moves(packed, plies, cols=NIBBLE_COLS):
+    """Inverse of pack_moves for the first `plies` columns."""
+    if cols > NIBBLE_COLS:
+        return list(packed[:plies])
+    moves = [col for byte in packed[:(plies + 1) // 2] for col in _NIBBLES[byte]]
+    del moves[plies:]
+    return moves
+
+
+class GameRecord:
+    """One finished game: board size, columns played, result and metadata."""
+
+    __slots__ = ("rows", "cols", "plies", "result", "packed", "_meta")
+
+    def __init__(self, rows, cols, packed, plies, result, meta=b""):
+        self.rows = rows
+        self.cols = cols
+        self.packed = packed
+        self.plies = plies
+        self.result = result
+        # Raw JSON bytes until first accessed through .meta
+        self._meta = meta
+
+    @classmethod
+    def from_moves(cls, rows, cols, moves, result, meta=None):
+        """Record of the 0-based columns in `moves`; result is RED, YELLOW or EMPTY (draw)."""
+        if rows > MAX_SIZE or cols > MAX_SIZE:
+            raise ValueError(f"game records hold at most {MAX_SIZE} rows and columns")
+        if result not in (RED, YELLOW, EMPTY):
+            raise ValueError(f"invalid result {result!r}")
+        return cls(rows, cols, pack_moves(moves, cols), len(moves), result, meta or {})
+
+    @property
+    def moves(self):
+        return unpack_moves(self.packed, self.plies, self.cols)
+
+    @property
+    def meta(self):
+        if isinstance(self._meta, (bytes, bytearray)):
+            self._meta = json.loads(self._meta) if self._meta else {}
+        return self._meta
+
+    def opening(self, plies):
+        """The first `plies` columns (fewer if the game was shorter), as a tuple."""
+        return tuple(unpack_moves(self.packed, min(plies, self.plies), self.cols))
+
+    def move_string(self):
+        return moves_to_string(self.moves)
+
+    def to_bytes(self):
+        meta = self._meta
+        if not isinstance(meta, (bytes, bytearray)):
+            meta = json.dumps(meta, separators=(",", ":")).encode() if meta else b""
+        return RECORD.pack(self.rows, self.cols, self.plies, self.result, len(meta)) + self.packed + meta
+
+
+def append_game(path, record):
+    """Add a record to the end of a game file, creating it (and its directory) if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "ab") as f:
+        data = record.to_bytes()
+        if f.tell() == 0:
+            data = FILE_HEADER.pack(MAGIC, VERSION) + data
+        f.write(data)
+
+
+def read_games(path):
+    """Yield every record of a game file in order, reading it through mmap."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if size < FILE_HEADER.size or FILE_HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+                raise ValueError(f"{path} is not a version {VERSION} game record file")
+            unpack = RECORD.unpack_from
+            record_size = RECORD.size
+            offset = FILE_HEADER.size
+            while offset < size:
+                if offset + record_size > size:
+                    raise ValueError(f"{path}: truncated record at byte {offset}")
+                rows, cols, plies, result, meta_size = unpack(data, offset)
+                moves_at = offset + record_size
+                meta_at = moves_at + moves_size(cols, plies)
+                offset = meta_at + meta_size
+                if offset > size:
+                    raise ValueError(f"{path}: truncated record at byte {moves_at - record_size}")
+                yield GameRecord(rows, cols, data[moves_at:meta_at], plies, result, data[meta_at:offset])
+
+
+def read_game(path, index=-1):
+    """The record at `index` (negative counts from the end) of a game file."""
+    if index < 0:
+        last = deque(read_games(path), maxlen=-index)
+        if len(last) == -index:
+            return last[0]
+    else:
+        for i, record in enumerate(read_games(path)):
+            if i == index:
+                return record
+    raise IndexError(f"{path} has no game {index}")
+
+
+def game_stats(records, opening_plies=2):
+    """
+    Totals over records: games, wins per side, draws and average length per
+    board size, and per opening (the first opening_plies columns) the number
+    of games and results.
+    """
+    sizes = {}
+    openings = {}
+    for record in records:
+        size = (record.rows, record.cols)
+        totals = sizes.get(size)
+        if totals is None:
+            totals = sizes[size] = {RED: 0, YELLOW: 0, EMPTY: 0, "plies": 0}
+        totals[record.result] += 1
+        totals["plies"] += record.plies
+        key = (size, record.opening(opening_plies))
+        results = openings.get(key)
+        if results is None:
+            results = openings[key] = {RED: 0, YELLOW: 0, EMPTY: 0}
+        results[record.result] += 1
+    return sizes, openings
+
+
+def format_results(results):
+    games = results[RED] + results[YELLOW] + results[EMPTY]
+    return (f"{games} games, red {100 * results[RED] / games:.1f}% yellow {100 * results[YELLOW] / games:.1f}% "
+            f"draw {100 * results[EMPTY] / games:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read game record files",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="results, game length and opening win rates")
+    stats.add_argument("files", nargs="+")
+    stats.add_argument("--opening-plies", type=int, default=2)
+    stats.add_argument("--top", type=int, default=10, help="most played openings shown per board size")
+    export = commands.add_parser("export", help="one JSON line per game, readable by analyze.py")
+    export.add_argument("files", nargs="+")
+    export.add_argument("--meta", action="store_true", help="include the metadata")
+    export.add_argument("--positions", action="store_true",
+                        help="one line per position before each move instead of one per game, for analyze.py")
+    args = parser.parse_args(argv)
+
+    records = (record for path in args.files for record in read_games(path))
+    if args.command == "export":
+        for i, record in enumerate(records):
+            if args.positions:
+                moves = record.move_string()
+                for ply in range(record.plies):
+                    line = {"id": f"{i}:{ply}", "moves": moves[:ply], "rows": record.rows, "cols": record.cols}
+                    sys.stdout.write(json.dumps(line) + "\n")
+                continue
+            line = {"id": i, "moves": record.move_string(), "rows": record.rows, "cols": record.cols,
+                    "result": record.result}
+            if args.meta:
+                line["meta"] = record.meta
+            sys.stdout.write(json.dumps(line) + "\n")
+        return
+
+    sizes, openings = game_stats(records, args.opening_plies)
+    for (rows, cols), totals in sorted(sizes.items()):
+        games = totals[RED] + totals[YELLOW] + totals[EMPTY]
+        print(f"{cols}x{rows}: {format_results(totals)}, average length {totals['plies'] / games:.1f} plies")
+        played = sorted(((sum(results.values()), opening, results) for (size, opening), results in openings.items()
+                         if size == (rows, cols)), key=lambda item: (-item[0], item[1]))
+        for _, opening, results in played[:args.top]:
+            print(f"  {moves_to_string(opening) or '(none)':<{args.opening_plies}}  {format_results(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from board import Board
+
+# Plies between stored checkpoint positions; no checkpoint is taken before the first interval
+CHECKPOINT_INTERVAL = 64
+
+
+class MoveHistory:
+    """
+    Game history stored as the list of columns played, one byte per move.
+
+    Indexing works like a list of the positions after each move: history[0]
+    is the empty board and history[len(history) - 1] the latest position.
+    Positions are rebuilt on a single cursor board by playing or undoing
+    moves from wherever the cursor is, so stepping to a neighbouring ply
+    costs one move. Every checkpoint_interval plies a copy of the position
+    is kept, and a jump starts from the nearest checkpoint when that is
+    closer than the cursor. Pass checkpoint_interval=None to keep none.
+
+    The returned board is the cursor itself and changes on the next
+    lookup; copy it to keep it.
+    """
+
+    def __init__(self, rows, cols, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.moves = bytearray()
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = [Board(rows, cols)]
+        self.cursor = Board(rows, cols)
+
+    def __len__(self):
+        return len(self.moves) + 1
+
+    def __getitem__(self, ply):
+        if ply < 0:
+            ply += len(self)
+        if not 0 <= ply < len(self):
+            raise IndexError("history index out of range")
+        self.seek(ply)
+        return self.cursor
+
+    def append(self, col):
+        """Record the next move."""
+        self.moves.append(col)
+        interval = self.checkpoint_interval
+        if interval and len(self.moves) % interval == 0:
+            self.seek(len(self.moves))
+            self.checkpoints.append(self.cursor.copy())
+
+    def seek(self, ply):
+        """Move the cursor board to the position after `ply` moves."""
+        cursor = self.cursor
+        interval = self.checkpoint_interval
+        if interval:
+            nearest = min(ply // interval, len(self.checkpoints) - 1)
+            if ply - nearest * interval < abs(ply - cursor.moves):
+                cursor = self.cursor = self.checkpoints[nearest].copy()
+        while cursor.moves > ply:
+            cursor.undo_move(self.moves[cursor.moves - 1])
+        while cursor.moves < ply:
+            cursor.make_move(self.moves[cursor.moves], cursor.to_move)
+
+    def to_list(self):
+        """Columns played, in order."""
+        return list(self.moves)
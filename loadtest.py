@@ -0,0 +1,116 @@
+"""
+Load test for server.py: opens several connections, each sending requests
+one after another as fast as the answers come back, and reports
+throughput and latency percentiles.
+
+    python server.py --port 8765 &
+    python loadtest.py --port 8765 --connections 8 --requests 400
+
+Positions are random openings from a fixed seed. --unique sets how many
+distinct positions there are, so a small number exercises the server's
+cache and request coalescing and a large one its search throughput.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from tournament import random_opening
+from utility import ROWS, COLS, moves_to_string
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("server closed the connection")
+    return json.loads(line)
+
+
+async def client(args, client_id, positions, count, latencies, errors):
+    """Closed loop: send one request, wait for its answer, send the next."""
+    rng = random.Random(args.seed + client_id)
+    reader, writer = await connect(args)
+    try:
+        for i in range(count):
+            message = {"id": i, "op": args.op, "moves": rng.choice(positions), "rows": args.rows,
+                       "cols": args.cols, "depth": args.depth}
+            if args.time_ms:
+                message["time_ms"] = args.time_ms
+            start = time.perf_counter()
+            response = await request(reader, writer, message)
+            latencies.append(time.perf_counter() - start)
+            if not response.get("ok"):
+                errors[response.get("error")] = errors.get(response.get("error"), 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    positions = [moves_to_string(random_opening(rng, rng.randint(0, args.max_plies), args.rows, args.cols))
+                 for _ in range(args.unique)]
+    latencies = []
+    errors = {}
+    per_client = [args.requests // args.connections + (i < args.requests % args.connections)
+                  for i in range(args.connections)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, i, positions, count, latencies, errors)
+                           for i, count in enumerate(per_client)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await connect(args)
+    stats = await request(reader, writer, {"id": "stats", "op": "stats"})
+    writer.close()
+
+    latencies.sort()
+    ms = 1000
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50 {percentile(latencies, 0.5) * ms:.1f}ms  p90 {percentile(latencies, 0.9) * ms:.1f}ms  "
+          f"p99 {percentile(latencies, 0.99) * ms:.1f}ms  max {latencies[-1] * ms:.1f}ms")
+    for error, count in sorted(errors.items()):
+        print(f"error {error!r}: {count}")
+    stats.pop("id", None)
+    stats.pop("ok", None)
+    print("server " + " ".join(f"{name}={value}" for name, value in stats.items()))
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the analysis server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400, help="total requests over all connections")
+    parser.add_argument("--op", choices=("best_move", "scores"), default="best_move")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--time-ms", type=int, default=None, help="time budget per request")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--unique", type=int, default=50, help="distinct positions requested")
+    parser.add_argument("--max-plies", type=int, default=8, help="longest random opening")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,25 @@
+import argparse
 import pygame
 from connect_four import ConnectFour
+from game_record import read_game
+from utility import ROWS, COLS
 
 if __name__ == "__main__":
-    game = ConnectFour()
+    parser = argparse.ArgumentParser(description="AI vs AI Connect Four")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--time-ms", type=int, default=None,
+                        help="per-move time budget for both players (recommended above 5x4)")
+    parser.add_argument("--replay", metavar="FILE", help="step through a game from a game record file")
+    parser.add_argument("--game", type=int, default=-1, help="game to replay, counting from 0 (default: the last)")
+    args = parser.parse_args()
+
+    record = None
+    if args.replay:
+        record = read_game(args.replay, args.game)
+        args.rows, args.cols = record.rows, record.cols
+    game = ConnectFour(args.rows, args.cols, args.time_ms)
+    if record is not None:
+        game.load_game(record)
     game.run()
-    pygame.quit()
\ No newline at end of file
+    pygame.quit()
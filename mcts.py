@@ -0,0 +1,325 @@
+"""
+Monte Carlo tree search (UCT) engine with the best_move interface of minimax.
+
+Playouts run on bare bitboards rather than Position objects. A heuristic
+playout takes an immediate win when one exists and blocks the opponent's
+immediate win; anything else is a random move. The tree is kept between
+calls. When the next position is a child or grandchild of the last root
+(our move, then the opponent's reply), that subtree becomes the new root.
+
+With workers > 1 the search is root-parallel. Every worker process grows
+its own tree for the same budget and the visit counts of the root moves
+are summed.
+"""
+import math
+import os
+import random
+import time
+from utility import RED, MCTS_ITERATIONS_PER_DEPTH
+
+# UCT exploration constant
+EXPLORATION = 1.4
+# The time budget and stop event are checked every CHECK_INTERVAL iterations
+CHECK_INTERVAL = 64
+
+# Running total of playouts, like minimax.node_count
+playout_count = 0
+# Statistics of the last search: playouts, seconds, playouts_per_second, reused visits, workers
+last_stats = None
+
+_masks = {}
+
+
+def board_masks(geometry):
+    """(all cells, bottom cell of each column, per-column masks) for a board size."""
+    masks = _masks.get(geometry)
+    if masks is None:
+        height = geometry.height
+        column = (1 << geometry.rows) - 1
+        columns = [column << (c * height) for c in range(geometry.cols)]
+        bottom = sum(1 << (c * height) for c in range(geometry.cols))
+        masks = _masks[geometry] = (sum(columns), bottom, columns)
+    return masks
+
+
+def winning_cells(bits, height, board_mask):
+    """Every cell, filled or not, that would complete four in a row for the pieces in `bits`."""
+    cells = (bits << 1) & (bits << 2) & (bits << 3)
+    for shift in (height, height - 1, height + 1):
+        pair = (bits << shift) & (bits << 2 * shift)
+        cells |= pair & (bits << 3 * shift)
+        cells |= pair & (bits >> shift)
+        pair = (bits >> shift) & (bits >> 2 * shift)
+        cells |= pair & (bits << shift)
+        cells |= pair & (bits >> 3 * shift)
+    return cells & board_mask
+
+
+def rollout(pieces, occupied, turn, geometry, rng, heuristic=True):
+    """
+    Play random moves to the end of the game from the bitboards in
+    `pieces` (indexed 0 for RED, 1 for YELLOW) with `turn` to move.
+    Returns the winner's index, or None for a draw.
+    """
+    board_mask, bottom, columns = board_masks(geometry)
+    height = geometry.height
+    pieces = pieces[:]
+    while occupied != board_mask:
+        playable = (occupied + bottom) & board_mask
+        if heuristic:
+            if winning_cells(pieces[turn], height, board_mask) & playable:
+                return turn
+            threats = winning_cells(pieces[1 - turn], height, board_mask) & playable
+            if threats & (threats - 1):
+                return 1 - turn
+            if threats:
+                move = threats
+            else:
+                move = 0
+                while not move:
+                    move = playable & columns[rng.randrange(len(columns))]
+        else:
+            move = 0
+            while not move:
+                move = playable & columns[rng.randrange(len(columns))]
+        pieces[turn] |= move
+        occupied |= move
+        if not heuristic and move & winning_cells(pieces[turn] ^ move, height, board_mask):
+            return turn
+        turn = 1 - turn
+    return None
+
+
+class Node:
+    """Tree node, reached by `mover` (0 RED, 1 YELLOW) playing `move`."""
+
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins", "result")
+
+    def __init__(self, move, mover, parent, untried, result=False):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        # Winner index or None (draw) when the game is over at this node, else False
+        self.result = result
+
+
+class MCTS:
+    """
+    Anytime UCT search. Keep one instance for a game so each search can
+    reuse the subtree of the previous one.
+    """
+
+    def __init__(self, exploration=EXPLORATION, heuristic=True, seed=None):
+        self.exploration = exploration
+        self.heuristic = heuristic
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_pieces = None
+        self.geometry = None
+
+    def reset(self):
+        self.root = None
+        self.root_pieces = None
+
+    def _playable_columns(self, occupied):
+        board_mask, bottom, columns = board_masks(self.geometry)
+        playable = (occupied + bottom) & board_mask
+        return [c for c, column in enumerate(columns) if playable & column]
+
+    def _play(self, pieces, occupied, col, turn):
+        board_mask, bottom, columns = board_masks(self.geometry)
+        move = (occupied + bottom) & columns[col]
+        pieces[turn] |= move
+        return occupied | move
+
+    def _reuse(self, pieces):
+        """Descendant of the old root, at most two plies down, with these pieces; else None."""
+        if self.root is None:
+            return None
+        frontier = [(self.root, self.root_pieces)]
+        for _ in range(2):
+            next_frontier = []
+            for node, node_pieces in frontier:
+                for child in node.children:
+                    child_pieces = node_pieces[:]
+                    self._play(child_pieces, node_pieces[0] | node_pieces[1], child.move, child.mover)
+                    if child_pieces == pieces:
+                        return child
+                    next_frontier.append((child, child_pieces))
+            frontier = next_frontier
+        return None
+
+    def search(self, board, player, iterations=None, time_ms=None, stop_event=None):
+        """
+        Grow the tree from board with player to move until `iterations`
+        playouts or `time_ms` milliseconds are used up (whichever comes
+        first; at least one budget is required). Returns {col: visits}
+        for the root moves.
+        """
+        global playout_count, last_stats
+        if iterations is None and time_ms is None:
+            raise ValueError("MCTS needs an iteration or time budget")
+        start = time.perf_counter()
+        deadline = start + time_ms / 1000 if time_ms is not None else None
+
+        pieces = [board.red, board.yellow]
+        turn = 0 if player == RED else 1
+        if board.geometry is not self.geometry:
+            self.geometry = board.geometry
+            self.root = None
+        root = self._reuse(pieces)
+        if root is None or root.result is not False:
+            root = Node(None, 1 - turn, None, self._playable_columns(board.red | board.yellow))
+        root.parent = None
+        self.root, self.root_pieces = root, pieces
+        reused = root.visits
+
+        board_mask = board_masks(self.geometry)[0]
+        rng = self.rng
+        exploration = self.exploration
+        done = 0
+        while iterations is None or done < iterations:
+            if done % CHECK_INTERVAL == 0 and done:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if stop_event is not None and stop_event.is_set():
+                    break
+            done += 1
+
+            node = root
+            node_pieces = pieces[:]
+            occupied = node_pieces[0] | node_pieces[1]
+            turn = 1 - root.mover
+
+            # Selection: descend through fully expanded nodes by UCT
+            while not node.untried and node.children:
+                log_visits = math.log(node.visits)
+                node = max(node.children, key=lambda child: child.wins / child.visits
+                           + exploration * math.sqrt(log_visits / child.visits))
+                occupied = self._play(node_pieces, occupied, node.move, turn)
+                turn = 1 - turn
+
+            # Expansion: add one untried move
+            if node.untried:
+                col = node.untried.pop(rng.randrange(len(node.untried)))
+                occupied = self._play(node_pieces, occupied, col, turn)
+                if self._won(node_pieces[turn]):
+                    result, untried = turn, []
+                elif occupied == board_mask:
+                    result, untried = None, []
+                else:
+                    result, untried = False, self._playable_columns(occupied)
+                child = Node(col, turn, node, untried, result)
+                node.children.append(child)
+                node = child
+                turn = 1 - turn
+
+            # Simulation
+            if node.result is not False:
+                winner = node.result
+            else:
+                winner = rollout(node_pieces, occupied, turn, self.geometry, rng, self.heuristic)
+
+            # Backpropagation: each node scores the result for the player who moved into it
+            while node is not None:
+                node.visits += 1
+                if winner is None:
+                    node.wins += 0.5
+                elif winner == node.mover:
+                    node.wins += 1
+                node = node.parent
+
+        elapsed = time.perf_counter() - start
+        playout_count += done
+        last_stats = {
+            "playouts": done,
+            "seconds": elapsed,
+            "playouts_per_second": done / elapsed if elapsed > 0 else 0.0,
+            "reused_visits": reused,
+            "workers": 1,
+        }
+        return {child.move: child.visits for child in root.children}
+
+    def _won(self, bits):
+        for shift in self.geometry.win_shifts:
+            m = bits & (bits >> shift)
+            if m & (m >> 2 * shift):
+                return True
+        return False
+
+
+def pick_most_visited(visits, order):
+    """Column with the most visits, ties going to the first in `order` (center-first)."""
+    return max((col for col in order if col in visits), key=lambda col: visits[col])
+
+
+_engine = MCTS()
+
+
+def _search_task(board, player, iterations, time_ms, seed):
+    """Runs in a worker process: one independent tree for the whole budget."""
+    _engine.rng.seed(seed)
+    visits = _engine.search(board, player, iterations, time_ms)
+    return visits, last_stats["playouts"]
+
+
+def best_move(board, depth, player, iterations=None, time_ms=None, workers=1, stop_event=None, tree=None):
+    """
+    MCTS move with the signature of minimax.best_move. Without an
+    iteration or time budget, depth sets it to depth *
+    MCTS_ITERATIONS_PER_DEPTH playouts. workers > 1 spreads the playouts
+    over a process pool (the same pool as parallel.py), each worker taking
+    an equal share of an iteration budget or the full time budget.
+
+    A single-process search that sees stop_event set stops early and
+    returns the best move so far. A parallel one raises
+    minimax.SearchCancelled instead, without waiting for the worker
+    processes, which finish their share in the background. tree is the
+    MCTS instance to search with, by default one shared by the module.
+    """
+    global playout_count, last_stats
+    if iterations is None and time_ms is None:
+        iterations = depth * MCTS_ITERATIONS_PER_DEPTH
+    if time_ms is None and iterations <= 0:
+        raise ValueError(f"MCTS needs a positive budget, got {iterations} playouts")
+    order = board.geometry.center_order
+    tree = tree or _engine
+
+    if workers == 1:
+        return pick_most_visited(tree.search(board, player, iterations, time_ms, stop_event), order)
+
+    from parallel import get_pool, wait_all
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    pool = get_pool(workers)
+    share = -(-iterations // workers) if iterations is not None else None
+    futures = [pool.submit(_search_task, board, player, share, time_ms, tree.rng.getrandbits(32))
+               for _ in range(workers)]
+    wait_all(futures, stop_event)
+
+    visits = {}
+    playouts = 0
+    for future in futures:
+        worker_visits, worker_playouts = future.result()
+        playouts += worker_playouts
+        for col, count in worker_visits.items():
+            visits[col] = visits.get(col, 0) + count
+    elapsed = time.perf_counter() - start
+    playout_count += playouts
+    last_stats = {
+        "playouts": playouts,
+        "seconds": elapsed,
+        "playouts_per_second": playouts / elapsed if elapsed > 0 else 0.0,
+        "reused_visits": 0,
+        "workers": len(futures),
+    }
+    return pick_most_visited(visits, order)
+
+
+def clear_tree():
+    """Forget the search tree (call between games)."""
+    _engine.reset()
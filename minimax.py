@@ -1,14 +1,99 @@
+import atexit
 import math
-from utility import ROWS, COLS, RED, YELLOW, EMPTY
+import time
+from collections import defaultdict
+from database import lookup_best_move
+from position import Position
+from profiling import SearchStats, timed
+from transposition import TranspositionTable, SIDE_KEY
+from tt_cache import PersistentCache, evaluator_salt
+from utility import COLS, RED, YELLOW, EMPTY, TT_MEMORY_MB, TT_CACHE_FILE, TT_CACHE_MIN_DEPTH, center_order
+from utility import WEIGHT_THREE, WEIGHT_TWO, WEIGHT_ONE, WEIGHT_OPPONENT_THREE
 
 WIN_SCORE = 10000
 
-transposition_table = {}
+# Transposition table bound flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
 
+# Center-first column order of the default board. Searches use the order of
+# the board's own geometry, for root tie-breaking and move ordering.
+column_priority = center_order(COLS)
 
-def board_to_key(board):
-    """Convert board to a hashable key for caching."""
-    return tuple(tuple(row) for row in board.grid)
+# Deepest search supported (depths are stored in a byte in the transposition table)
+MAX_DEPTH = 255
+
+transposition_table = TranspositionTable(TT_MEMORY_MB * 1024 * 1024)
+
+# Optional on-disk cache of deep results, see open_persistent_cache. Keys are
+# salted per evaluator so their results never mix.
+persistent_cache = None
+_cache_salt = evaluator_salt("window")
+
+# Move ordering heuristics, indexed by remaining depth and by player
+killer_moves = [[None, None] for _ in range(MAX_DEPTH + 1)]
+history_scores = {RED: defaultdict(int), YELLOW: defaultdict(int)}
+
+# Nodes visited by minimax; search limits are checked every STOP_CHECK_INTERVAL of them
+node_count = 0
+# Running totals of static evaluations at leaf nodes and of beta cutoffs
+leaf_count = 0
+cutoff_count = 0
+# SearchStats of the last best_move or iterative_deepening call
+last_stats = None
+# Callbacks given (name, seconds) for every evaluate and check_win call, see add_profile_hook
+_profile_hooks = []
+STOP_CHECK_INTERVAL = 1024
+_limited = False
+_stop_event = None
+_deadline = None
+_node_limit = None
+
+
+class SearchCancelled(Exception):
+    """Raised from inside the search when its stop event has been set."""
+
+
+class SearchTimeout(Exception):
+    """Raised from inside the search when its time or node budget runs out."""
+
+
+def _set_limits(stop_event=None, deadline=None, node_limit=None):
+    global _limited, _stop_event, _deadline, _node_limit
+    _stop_event, _deadline, _node_limit = stop_event, deadline, node_limit
+    _limited = stop_event is not None or deadline is not None or node_limit is not None
+
+
+def _check_limits():
+    if _stop_event is not None and _stop_event.is_set():
+        raise SearchCancelled
+    if _deadline is not None and time.perf_counter() >= _deadline:
+        raise SearchTimeout
+    if _node_limit is not None and node_count >= _node_limit:
+        raise SearchTimeout
+
+
+def board_to_key(board, maximizing_player):
+    """
+    Transposition key of the board searched with RED (maximizing_player) or
+    YELLOW to move: the smaller of the Zobrist hashes of the position and
+    of its mirror image, so both share one entry, plus the side to move.
+    """
+    return canonical_key(board, maximizing_player)[0]
+
+
+def canonical_key(board, maximizing_player):
+    """
+    (key, mirrored) where key is board_to_key(board, maximizing_player)
+    and mirrored tells whether it is the hash of the mirror image. Moves
+    stored under the key are in the orientation it hashes, so flip them
+    when mirrored is True.
+    """
+    side = SIDE_KEY if maximizing_player else 0
+    if board.mirror_hash < board.hash:
+        return board.mirror_hash ^ side, True
+    return board.hash ^ side, False
 
 
 def evaluate_window(window, piece):
@@ -16,19 +101,23 @@ def evaluate_window(window, piece):
     opponent = RED if piece == YELLOW else YELLOW
 
     if window.count(piece) == 3 and window.count(EMPTY) == 1:
-        score += 400
+        score += WEIGHT_THREE
     elif window.count(piece) == 2 and window.count(EMPTY) == 2:
-        score += 20
+        score += WEIGHT_TWO
     elif window.count(piece) == 1 and window.count(EMPTY) == 3:
-        score += 1
+        score += WEIGHT_ONE
 
     if window.count(opponent) == 3 and window.count(EMPTY) == 1:
-        score -= 350
+        score += WEIGHT_OPPONENT_THREE
 
     return score
 
 
 def evaluate(board):
+    """
+    Static evaluation from RED's point of view. The window heuristic is kept
+    up to date by make_move/undo_move, so this is O(1).
+    """
     if board.check_win(RED):
         return WIN_SCORE
     elif board.check_win(YELLOW):
@@ -36,113 +125,630 @@ def evaluate(board):
     elif board.is_full():
         return 0
 
+    return board.score
+
+
+def evaluate_terminal(board):
+    """Wins and losses only: every position that is not won scores 0."""
+    if board.check_win(RED):
+        return WIN_SCORE
+    elif board.check_win(YELLOW):
+        return -WIN_SCORE
+    return 0
+
+
+# Static evaluators selectable with set_evaluator; the search calls `evaluator`
+EVALUATORS = {
+    "window": evaluate,
+    "terminal": evaluate_terminal,
+}
+evaluator = evaluate
+evaluator_name = "window"
+_tables = {}
+
+
+def set_evaluator(name):
+    """
+    Switch the search to another evaluator. Scores from different
+    evaluators must not mix, so each one keeps its own transposition table.
+    """
+    global evaluator, evaluator_name, transposition_table, _cache_salt
+    if name not in EVALUATORS:
+        raise ValueError(f"unknown evaluator {name!r}, expected one of {', '.join(EVALUATORS)}")
+    if name == evaluator_name:
+        return
+    _tables[evaluator_name] = transposition_table
+    transposition_table = _tables.pop(name, None) or TranspositionTable(TT_MEMORY_MB * 1024 * 1024)
+    evaluator = EVALUATORS[name]
+    if _profile_hooks:
+        evaluator = timed("evaluate", evaluator, _profile_hooks)
+    evaluator_name = name
+    _cache_salt = evaluator_salt(name)
+
+
+# Root search drivers selectable per player with the `strategy` argument
+STRATEGIES = ("minimax", "pvs", "mtdf")
+
+
+def evaluate_grid(grid):
+    """
+    Window heuristic rescanned from a list-of-lists grid with
+    evaluate_window. Reference for the incremental score.
+    """
+    rows, cols = len(grid), len(grid[0])
     score = 0
 
-    for r in range(ROWS):
-        row_array = [board.grid[r][c] for c in range(COLS)]
-        for c in range(COLS - 3):
+    for r in range(rows):
+        row_array = [grid[r][c] for c in range(cols)]
+        for c in range(cols - 3):
             window = row_array[c:c + 4]
             score += evaluate_window(window, RED)
 
-    for c in range(COLS):
-        col_array = [board.grid[r][c] for r in range(ROWS)]
-        for r in range(ROWS - 3):
+    for c in range(cols):
+        col_array = [grid[r][c] for r in range(rows)]
+        for r in range(rows - 3):
             window = col_array[r:r + 4]
             score += evaluate_window(window, RED)
 
-    for r in range(3, ROWS):
-        for c in range(COLS - 3):
-            window = [board.grid[r - i][c + i] for i in range(4)]
+    for r in range(3, rows):
+        for c in range(cols - 3):
+            window = [grid[r - i][c + i] for i in range(4)]
             score += evaluate_window(window, RED)
 
-    for r in range(3, ROWS):
-        for c in range(3, COLS):
-            window = [board.grid[r - i][c - i] for i in range(4)]
+    for r in range(3, rows):
+        for c in range(3, cols):
+            window = [grid[r - i][c - i] for i in range(4)]
             score += evaluate_window(window, RED)
 
     return score
 
 
-def minimax(board, depth, maximizing_player):
+def order_moves(board, depth, player, tt_move=None):
+    """
+    Order moves for search: transposition-table move first, then killer
+    moves, then by history score, falling back to center-first order.
     """
-    Minimax with transposition table optimization.
+    killers = killer_moves[depth]
+    history = history_scores[player]
+    center_rank = board.geometry.center_rank
+    return sorted(
+        board.valid_moves(),
+        key=lambda col: (col != tt_move, col not in killers, -history[col], center_rank[col])
+    )
+
+
+def record_cutoff(depth, player, col):
+    """Remember a move that caused a beta cutoff for killer/history ordering."""
+    global cutoff_count
+    cutoff_count += 1
+    killers = killer_moves[depth]
+    if killers[0] != col:
+        killers[1] = killers[0]
+        killers[0] = col
+    history_scores[player][col] += depth * depth
+
+
+def _probe(board, depth, maximizing_player, alpha, beta):
     """
-    if board.check_win(RED) or board.check_win(YELLOW) or board.is_full():
-        return evaluate(board)
+    Transposition table lookup for a node, falling back to the persistent
+    cache at deep nodes. Returns (value, alpha, beta, tt_move): value is
+    the stored result when it settles the node (exact, or a bound outside
+    the window) and None otherwise, alpha and beta are narrowed by a stored
+    bound, and tt_move is the stored best move in the board's orientation.
+    """
+    board_key, mirrored = canonical_key(board, maximizing_player)
+    entry = transposition_table.probe(board_key, depth)
+    if entry is None and persistent_cache is not None and depth >= TT_CACHE_MIN_DEPTH:
+        entry = persistent_cache.probe(board_key, depth, _cache_salt)
+    if entry is None:
+        return None, alpha, beta, None
+    flag, value, tt_move = entry
+    if mirrored and tt_move is not None:
+        tt_move = board.cols - 1 - tt_move
+    if flag == EXACT:
+        return value, alpha, beta, tt_move
+    elif flag == LOWER:
+        alpha = max(alpha, value)
+    else:
+        beta = min(beta, value)
+    if alpha >= beta:
+        return value, alpha, beta, tt_move
+    return None, alpha, beta, tt_move
+
+
+def _store(board, depth, maximizing_player, value, best_col, alpha, beta):
+    """Store a node's result, flagged as a bound when it fell outside the (alpha, beta) it was searched with."""
+    if value <= alpha:
+        flag = UPPER
+    elif value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    board_key, mirrored = canonical_key(board, maximizing_player)
+    if mirrored:
+        best_col = board.cols - 1 - best_col
+    transposition_table.store(board_key, depth, flag, value, best_col)
+    if persistent_cache is not None and depth >= TT_CACHE_MIN_DEPTH:
+        persistent_cache.record(board_key, depth, flag, value, best_col, _cache_salt)
 
-    if depth == 0:
-        return evaluate(board)
 
-    board_key = board_to_key(board)
-    cache_key = (board_key, depth, maximizing_player)
+def minimax(board, depth, maximizing_player, alpha=-math.inf, beta=math.inf):
+    """
+    Minimax with alpha-beta pruning, move ordering and a transposition table.
+    Returns the exact minimax value when it lies inside (alpha, beta),
+    otherwise a bound on the side of the window it fell on.
+    """
+    global node_count, leaf_count
+    node_count += 1
+    if _limited and node_count % STOP_CHECK_INTERVAL == 0:
+        _check_limits()
+
+    if board.check_win(RED) or board.check_win(YELLOW) or board.is_full() or depth == 0:
+        leaf_count += 1
+        return evaluator(board)
+
+    value, alpha, beta, tt_move = _probe(board, depth, maximizing_player, alpha, beta)
+    if value is not None:
+        return value
 
-    if cache_key in transposition_table:
-        return transposition_table[cache_key]
+    original_alpha, original_beta = alpha, beta
+    player = RED if maximizing_player else YELLOW
+    best_col = None
 
     if maximizing_player:
         max_eval = -math.inf
-        for col in board.valid_moves():
+        for col in order_moves(board, depth, player, tt_move):
             board.make_move(col, RED)
-            eval = minimax(board, depth - 1, False)
+            eval = minimax(board, depth - 1, False, alpha, beta)
+            board.undo_move(col)
+            if eval > max_eval:
+                max_eval = eval
+                best_col = col
+            alpha = max(alpha, eval)
+            if alpha >= beta:
+                record_cutoff(depth, player, col)
+                break
+        best_eval = max_eval
+    else:
+        min_eval = math.inf
+        for col in order_moves(board, depth, player, tt_move):
+            board.make_move(col, YELLOW)
+            eval = minimax(board, depth - 1, True, alpha, beta)
             board.undo_move(col)
-            max_eval = max(max_eval, eval)
+            if eval < min_eval:
+                min_eval = eval
+                best_col = col
+            beta = min(beta, eval)
+            if alpha >= beta:
+                record_cutoff(depth, player, col)
+                break
+        best_eval = min_eval
+
+    _store(board, depth, maximizing_player, best_eval, best_col, original_alpha, original_beta)
+    return best_eval
 
-        transposition_table[cache_key] = max_eval
-        return max_eval
+
+def pvs(board, depth, maximizing_player, alpha=-math.inf, beta=math.inf):
+    """
+    Principal variation search. The first move in order is searched with
+    the full window and every later move with a null window just above
+    alpha (below beta for YELLOW), re-searched with the full window only
+    when it turns out better. Same return contract and transposition
+    table as minimax.
+    """
+    global node_count, leaf_count
+    node_count += 1
+    if _limited and node_count % STOP_CHECK_INTERVAL == 0:
+        _check_limits()
+
+    if board.check_win(RED) or board.check_win(YELLOW) or board.is_full() or depth == 0:
+        leaf_count += 1
+        return evaluator(board)
+
+    value, alpha, beta, tt_move = _probe(board, depth, maximizing_player, alpha, beta)
+    if value is not None:
+        return value
+
+    original_alpha, original_beta = alpha, beta
+    player = RED if maximizing_player else YELLOW
+    best_col = None
+
+    if maximizing_player:
+        max_eval = -math.inf
+        for col in order_moves(board, depth, player, tt_move):
+            board.make_move(col, RED)
+            if best_col is None:
+                eval = pvs(board, depth - 1, False, alpha, beta)
+            else:
+                eval = pvs(board, depth - 1, False, alpha, alpha + 1)
+                if alpha < eval < beta:
+                    eval = pvs(board, depth - 1, False, alpha, beta)
+            board.undo_move(col)
+            if eval > max_eval:
+                max_eval = eval
+                best_col = col
+            alpha = max(alpha, eval)
+            if alpha >= beta:
+                record_cutoff(depth, player, col)
+                break
+        best_eval = max_eval
     else:
         min_eval = math.inf
-        for col in board.valid_moves():
+        for col in order_moves(board, depth, player, tt_move):
             board.make_move(col, YELLOW)
-            eval = minimax(board, depth - 1, True)
+            if best_col is None:
+                eval = pvs(board, depth - 1, True, alpha, beta)
+            else:
+                eval = pvs(board, depth - 1, True, beta - 1, beta)
+                if alpha < eval < beta:
+                    eval = pvs(board, depth - 1, True, alpha, beta)
             board.undo_move(col)
-            min_eval = min(min_eval, eval)
+            if eval < min_eval:
+                min_eval = eval
+                best_col = col
+            beta = min(beta, eval)
+            if alpha >= beta:
+                record_cutoff(depth, player, col)
+                break
+        best_eval = min_eval
 
-        transposition_table[cache_key] = min_eval
-        return min_eval
+    _store(board, depth, maximizing_player, best_eval, best_col, original_alpha, original_beta)
+    return best_eval
 
 
-def best_move(board, depth, player):
+def mtdf(board, depth, maximizing_player, guess=0):
+    """
+    MTD(f): converge on the exact minimax value with a series of null-window
+    alpha-beta searches starting from `guess`. Each search narrows the
+    bounds, and the transposition table keeps the work of earlier passes.
+    """
+    lower, upper = -math.inf, math.inf
+    value = guess
+    while lower < upper:
+        beta = value + 1 if value == lower else value
+        value = minimax(board, depth, maximizing_player, beta - 1, beta)
+        if value < beta:
+            upper = value
+        else:
+            lower = value
+    return value
+
+
+def plain_minimax(board, depth, maximizing_player):
+    """
+    Reference minimax without pruning or caching. Visits every node, so it
+    is only meant for checking the pruned search on small depths.
+    """
+    global node_count
+    node_count += 1
+    if board.check_win(RED) or board.check_win(YELLOW) or board.is_full() or depth == 0:
+        return evaluator(board)
+
+    player = RED if maximizing_player else YELLOW
+    scores = []
+    for col in board.valid_moves():
+        board.make_move(col, player)
+        scores.append(plain_minimax(board, depth - 1, not maximizing_player))
+        board.undo_move(col)
+    return max(scores) if maximizing_player else min(scores)
+
+
+def best_move(board, depth, player, pruning=True, stop_event=None, use_database=True, strategy="minimax"):
     """
     Find the best move for the given player.
-    Prioritizes center columns when scores are equal: 2, 1, 3, 0, 4
+    If the perfect-play database covers the position, its move is returned
+    without searching (pass use_database=False to always search).
+    Prioritizes center columns when scores are equal: 2, 1, 3, 0, 4 on
+    five columns, center-out on any width.
+
+    Each root move is searched with a window just above (RED) or below
+    (YELLOW) the best score so far, so only strictly better moves come back
+    exact and ties keep the earlier, more central column. With
+    pruning=False the root moves are scored with plain_minimax instead.
+    strategy picks the search driver from STRATEGIES: alpha-beta
+    "minimax", principal variation search "pvs", or "mtdf". All three
+    choose the same column.
+
+    If stop_event (a threading.Event) is set while searching, the search
+    raises SearchCancelled. The board is left mid-search in that case, so
+    callers that cancel should search a copy.
+
+    Counters and timing of the search are available afterwards from
+    search_stats().
+    """
+    global last_stats
+    stats = SearchStats(search_counters())
+    if use_database and pruning:
+        col = lookup_best_move(board, player)
+        if col is not None:
+            stats.from_database = True
+            last_stats = stats.finish(search_counters())
+            return col
+
+    _set_limits(stop_event)
+    try:
+        col, score = _search_root(board, depth, player, pruning, strategy=strategy)
+    finally:
+        _set_limits()
+    stats.lap(depth, search_counters(), score)
+    last_stats = stats.finish(search_counters())
+    return col
+
+
+def minimax_until(board, depth, maximizing_player, alpha, beta, deadline):
+    """minimax that raises SearchTimeout once time.perf_counter() reaches deadline."""
+    _set_limits(deadline=deadline)
+    try:
+        return minimax(board, depth, maximizing_player, alpha, beta)
+    finally:
+        _set_limits()
+
+
+def root_moves(board):
+    """
+    Valid moves in center-first order. In a position that is its own
+    mirror image, a move and its mirror score the same, so only the more
+    central of each pair (the one a tie would pick) is kept.
     """
     valid_moves = board.valid_moves()
-    column_priority = [2, 1, 3, 0, 4]
+    moves = [col for col in board.geometry.center_order if col in valid_moves]
+    if board.is_symmetric():
+        moves = [col for col in moves if moves.index(board.cols - 1 - col) >= moves.index(col)]
+    return moves
 
-    sorted_moves = [col for col in column_priority if col in valid_moves]
 
+def _search_root(board, depth, player, pruning, first=None, strategy="minimax", guess=None):
+    """
+    Root search returning (best_col, best_score). Moves are tried in
+    center-first order (see root_moves), or with `first` moved to the front. A move that
+    comes earlier in center-first order than the current best is searched
+    with a window one point wider, so it also comes back exact on a tie
+    and wins it. The result is the same whatever `first` is.
+
+    The "mtdf" strategy instead finds the root value with mtdf, starting
+    from `guess`, then plays the first move in center-first order that
+    reaches it.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+    transposition_table.new_search()
+    if strategy == "mtdf" and pruning:
+        return _mtdf_root(board, depth, player, guess)
+    search = pvs if strategy == "pvs" else minimax
+    sorted_moves = root_moves(board)
+    search_order = sorted_moves
+    if first in sorted_moves:
+        search_order = [first] + [col for col in sorted_moves if col != first]
+
+    best_col = None
+    best_score = None
+
+    for col in search_order:
+        wins_tie = best_col is not None and sorted_moves.index(col) < sorted_moves.index(best_col)
+        board.make_move(col, player)
+        if not pruning:
+            score = plain_minimax(board, depth - 1, player != RED)
+        elif best_col is None:
+            score = search(board, depth - 1, player != RED)
+        elif player == RED:
+            score = search(board, depth - 1, False, best_score - 1 if wins_tie else best_score, math.inf)
+        else:
+            score = search(board, depth - 1, True, -math.inf, best_score + 1 if wins_tie else best_score)
+        board.undo_move(col)
+
+        if (best_col is None or (score == best_score and wins_tie)
+                or (player == RED and score > best_score) or (player == YELLOW and score < best_score)):
+            best_score = score
+            best_col = col
+
+    return best_col, best_score
+
+
+def _mtdf_root(board, depth, player, guess=None):
+    """Root value by MTD(f), then the most central move that reaches it, each checked with a null window."""
+    value = mtdf(board, depth, player == RED, board.score if guess is None else guess)
+    for col in root_moves(board):
+        board.make_move(col, player)
+        if player == RED:
+            reaches = minimax(board, depth - 1, False, value - 1, value) >= value
+        else:
+            reaches = minimax(board, depth - 1, True, value, value + 1) <= value
+        board.undo_move(col)
+        if reaches:
+            return col, value
+
+
+def iterative_deepening(board, player, time_ms=None, max_nodes=None, max_depth=None, stop_event=None,
+                        use_database=True, strategy="minimax"):
+    """
+    Search depth 1, 2, 3, ... until the time budget (milliseconds) or node
+    budget runs out, and return (best_col, depth_reached) from the deepest
+    completed iteration. Each iteration searches the previous best move
+    first, which gives the rest of the root a tight bound (with strategy
+    "mtdf", the previous score is the first guess). Stops early once the
+    result is a forced win or loss, or the search reaches the end of the
+    game.
+
+    Depth 1 always completes, so a legal move is returned even with a tiny
+    budget. The board is left untouched. Positions covered by the
+    perfect-play database are answered from it, reported as searched to
+    max_depth (or the end of the game). Per-depth timing is available from
+    search_stats().
+    """
+    global last_stats
+    stats = SearchStats(search_counters())
+    remaining = board.geometry.size - board.moves
+    max_depth = min(max_depth or remaining, remaining)
+    col = lookup_best_move(board, player) if use_database else None
+    if col is not None:
+        stats.from_database = True
+        last_stats = stats.finish(search_counters())
+        return col, max_depth
+    best_col, best_score = _search_root(board.copy(), 1, player, True, strategy=strategy)
+    depth_reached = 1
+    stats.lap(1, search_counters(), best_score)
+
+    start = time.perf_counter()
+    deadline = start + time_ms / 1000 if time_ms is not None else None
+    node_limit = node_count + max_nodes if max_nodes is not None else None
+    _set_limits(stop_event, deadline, node_limit)
+    try:
+        for depth in range(2, max_depth + 1):
+            if abs(best_score) >= WIN_SCORE:
+                break
+            best_col, best_score = _search_root(board.copy(), depth, player, True, first=best_col,
+                                                strategy=strategy, guess=best_score)
+            depth_reached = depth
+            stats.lap(depth, search_counters(), best_score)
+    except SearchTimeout:
+        pass
+    finally:
+        _set_limits()
+
+    last_stats = stats.finish(search_counters())
+    return best_col, depth_reached
+
+
+def column_scores(board, depth, player):
+    """
+    Exact minimax score, from RED's point of view, of playing each valid
+    column. In a symmetric position each mirror pair is searched once.
+    """
+    transposition_table.new_search()
+    symmetric = board.is_symmetric()
+    scores = {}
+    for col in root_moves(board):
+        board.make_move(col, player)
+        scores[col] = minimax(board, depth - 1, player != RED)
+        board.undo_move(col)
+        if symmetric:
+            scores[board.cols - 1 - col] = scores[col]
+    return scores
+
+
+def iterative_column_scores(board, player, time_ms=None, max_depth=None, stop_event=None):
+    """
+    column_scores at depth 1, 2, 3, ... until the time budget (milliseconds)
+    runs out, and return (scores, depth_reached) from the deepest depth at
+    which every column finished. Stops early once every column is a forced
+    win or loss. Depth 1 always completes; the board is left untouched.
+    """
+    remaining = board.geometry.size - board.moves
+    max_depth = min(max_depth or remaining, remaining)
+    scores = column_scores(board.copy(), 1, player)
+    depth_reached = 1
+    deadline = time.perf_counter() + time_ms / 1000 if time_ms is not None else None
+    _set_limits(stop_event, deadline)
+    try:
+        for depth in range(2, max_depth + 1):
+            if all(abs(score) >= WIN_SCORE for score in scores.values()):
+                break
+            scores = column_scores(board.copy(), depth, player)
+            depth_reached = depth
+    except SearchTimeout:
+        pass
+    finally:
+        _set_limits()
+    return scores, depth_reached
+
+
+def pick_best(scores, player, order=column_priority):
+    """Best column from {col: score}, breaking ties by center-first order."""
+    ordered = [col for col in order if col in scores]
     if player == RED:
-        best_score = -math.inf
-        best_col = sorted_moves[0]
+        return max(ordered, key=lambda col: scores[col])
+    return min(ordered, key=lambda col: scores[col])
 
-        for col in sorted_moves:
-            board.make_move(col, RED)
-            score = minimax(board, depth - 1, False)
-            board.undo_move(col)
 
-            if score > best_score:
-                best_score = score
-                best_col = col
+def verify_best_move(board, depth, player):
+    """
+    Check that the pruned search picks the same column as plain minimax.
+    Returns (pruned_col, plain_col).
+    """
+    return best_move(board, depth, player, use_database=False), best_move(board, depth, player, pruning=False)
 
-        return best_col
 
-    else:
-        best_score = math.inf
-        best_col = sorted_moves[0]
+def new_search():
+    """Age transposition table entries before a search that does not go through best_move."""
+    transposition_table.new_search()
 
-        for col in sorted_moves:
-            board.make_move(col, YELLOW)
-            score = minimax(board, depth - 1, True)
-            board.undo_move(col)
 
-            if score < best_score:
-                best_score = score
-                best_col = col
+def set_table_size(megabytes):
+    """Replace the transposition table with an empty one of the given size."""
+    global transposition_table
+    transposition_table = TranspositionTable(megabytes * 1024 * 1024)
+    _tables.clear()
+
+
+def search_counters():
+    """Running totals of (nodes, leaves, cutoffs, tt_hits, tt_stores), in profiling.COUNTERS order."""
+    return node_count, leaf_count, cutoff_count, transposition_table.hits, transposition_table.stores
+
+
+def search_stats():
+    """SearchStats of the last best_move or iterative_deepening call, or None before the first."""
+    return last_stats
+
+
+def add_profile_hook(hook):
+    """
+    Call hook(name, seconds) after every evaluate and check_win call, with
+    name "evaluate" or "check_win". The hot paths are only wrapped while at
+    least one hook is registered, so profiling costs nothing when unused.
+    """
+    global evaluator
+    if not _profile_hooks:
+        evaluator = timed("evaluate", evaluator, _profile_hooks)
+        Position.check_win = timed("check_win", Position.check_win, _profile_hooks)
+    _profile_hooks.append(hook)
+
+
+def remove_profile_hook(hook):
+    """Unregister a hook; the hot paths are unwrapped once none are left."""
+    global evaluator
+    _profile_hooks.remove(hook)
+    if not _profile_hooks:
+        evaluator = EVALUATORS[evaluator_name]
+        Position.check_win = Position.check_win.__wrapped__
+
+
+def open_persistent_cache(path=TT_CACHE_FILE):
+    """
+    Consult and extend the on-disk cache at `path` in every search from
+    now on. Results are only written to the file by flush_persistent_cache,
+    which also runs at interpreter exit.
+    """
+    global persistent_cache
+    close_persistent_cache()
+    if path:
+        persistent_cache = PersistentCache(path)
+        atexit.register(close_persistent_cache)
+    return persistent_cache
+
+
+def flush_persistent_cache():
+    """Write results found since the last flush to the persistent cache file."""
+    if persistent_cache is not None:
+        persistent_cache.flush()
+
 
-        return best_col
+def close_persistent_cache():
+    global persistent_cache
+    if persistent_cache is not None:
+        persistent_cache.close()
+        atexit.unregister(close_persistent_cache)
+    persistent_cache = None
+
+
+def table_stats():
+    """Hit/miss/store/overwrite counters of the transposition table."""
+    return transposition_table.stats()
 
 
 def clear_cache():
-    """Clear the transposition table (call between games)."""
-    global transposition_table
-    transposition_table = {}
\ No newline at end of file
+    """Clear the transposition table and move ordering state (call between games)."""
+    transposition_table.clear()
+    for killers in killer_moves:
+        killers[0] = killers[1] = None
+    for history in history_scores.values():
+        history.clear()
@@ -0,0 +1,155 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from database import lookup_best_move
+from minimax import minimax, minimax_until, new_search, pick_best, root_moves, SearchCancelled, SearchTimeout
+from utility import RED
+
+_pool = None
+_pool_workers = None
+
+
+def get_pool(workers=None):
+    """Shared process pool. Workers live across searches and keep their transposition tables warm."""
+    global _pool, _pool_workers
+    workers = workers or os.cpu_count() or 1
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+    _pool_workers = None
+
+
+def _search_move(board, col, depth, player, alpha, beta, deadline=None):
+    """
+    Runs in a worker process: play col and search the reply position. The
+    deadline is wall-clock time (time.time()), as the process clocks of
+    the pool need not agree; past it the score is None.
+    """
+    new_search()
+    board.make_move(col, player)
+    if deadline is None:
+        return col, minimax(board, depth - 1, player != RED, alpha, beta)
+    try:
+        return col, minimax_until(board, depth - 1, player != RED, alpha, beta,
+                                  time.perf_counter() + deadline - time.time())
+    except SearchTimeout:
+        return col, None
+
+
+def wait_all(futures, stop_event, deadline=None):
+    """
+    Wait for every future. If stop_event is set first, cancel the rest and
+    raise SearchCancelled; if the wall-clock deadline passes, SearchTimeout.
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+        if stop_event is not None and stop_event.is_set():
+            for future in pending:
+                future.cancel()
+            raise SearchCancelled
+        if deadline is not None and pending and time.time() >= deadline:
+            for future in pending:
+                future.cancel()
+            raise SearchTimeout
+
+
+def _collect(futures, stop_event, deadline=None):
+    wait_all(futures, stop_event, deadline)
+    scores = dict(future.result() for future in futures)
+    if None in scores.values():
+        raise SearchTimeout
+    return scores
+
+
+def parallel_root_scores(board, depth, player, workers=None, stop_event=None, deadline=None):
+    """Exact score of every valid column, one worker task per column."""
+    pool = get_pool(workers)
+    futures = [pool.submit(_search_move, board, col, depth, player, -math.inf, math.inf, deadline)
+               for col in board.valid_moves()]
+    return _collect(futures, stop_event, deadline)
+
+
+def parallel_best_move(board, depth, player, workers=None, stop_event=None, deadline=None):
+    """
+    Root-split best_move over a process pool, returning the same column as
+    minimax.best_move.
+
+    The eldest root move (first in center-first order) is searched alone to
+    get a bound, young-brothers-wait style. The remaining root moves are
+    then searched in parallel with a window that only admits strictly
+    better scores. A move beaten by the eldest only returns a bound,
+    while every improving move returns its exact score. Ties break by
+    center-first order, as in the sequential search, and mirror twins in
+    a symmetric position are searched once. Positions covered by the
+    perfect-play database are answered from it.
+
+    With a wall-clock deadline (time.time()), raises SearchTimeout once it
+    passes; worker tasks stop at the same moment.
+    """
+    col = lookup_best_move(board, player)
+    if col is not None:
+        return col
+
+    order = board.geometry.center_order
+    sorted_moves = root_moves(board)
+    if depth <= 1 or len(sorted_moves) == 1:
+        return pick_best(parallel_root_scores(board, depth, player, workers, stop_event, deadline), player, order)
+
+    pool = get_pool(workers)
+    eldest = sorted_moves[0]
+    eldest_score = _collect([pool.submit(_search_move, board, eldest, depth, player, -math.inf, math.inf, deadline)],
+                            stop_event, deadline)[eldest]
+
+    if player == RED:
+        alpha, beta = eldest_score, math.inf
+    else:
+        alpha, beta = -math.inf, eldest_score
+    futures = [pool.submit(_search_move, board, col, depth, player, alpha, beta, deadline)
+               for col in sorted_moves[1:]]
+    scores = _collect(futures, stop_event, deadline)
+
+    # Only strictly better replies are exact; anything else cannot beat the eldest
+    if player == RED:
+        better = {col: score for col, score in scores.items() if score > eldest_score}
+    else:
+        better = {col: score for col, score in scores.items() if score < eldest_score}
+    if not better:
+        return eldest
+    return pick_best(better, player, order)
+
+
+def parallel_iterative_deepening(board, player, time_ms, max_depth=None, workers=None, stop_event=None):
+    """
+    Time-budgeted parallel_best_move: search depth 1, 2, 3, ... until
+    time_ms milliseconds run out and return (best_col, depth_reached) from
+    the deepest completed depth, like minimax.iterative_deepening. Each
+    depth starts from the tables the workers kept from the one before.
+    Depth 1 always completes, and positions covered by the perfect-play
+    database are answered from it.
+    """
+    remaining = board.geometry.size - board.moves
+    max_depth = min(max_depth or remaining, remaining)
+    col = lookup_best_move(board, player)
+    if col is not None:
+        return col, max_depth
+    deadline = time.time() + time_ms / 1000
+    best_col = parallel_best_move(board, 1, player, workers, stop_event)
+    depth_reached = 1
+    try:
+        for depth in range(2, max_depth + 1):
+            best_col = parallel_best_move(board, depth, player, workers, stop_event, deadline)
+            depth_reached = depth
+    except SearchTimeout:
+        pass
+    return best_col, depth_reached
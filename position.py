@@ -0,0 +1,263 @@
+import random
+from utility import ROWS, COLS, RED, YELLOW, EMPTY, window_cells, center_order
+from utility import WEIGHT_THREE, WEIGHT_TWO, WEIGHT_ONE, WEIGHT_OPPONENT_THREE
+
+
+class Geometry:
+    """
+    Bit layout and lookup tables for one board size, shared by every
+    position of that size. Get instances through geometry(rows, cols).
+
+    Each column takes rows + 1 bits: one per cell plus an always-empty
+    sentinel bit on top, so shifted masks never wrap from one column into
+    the next. Bit positions are col * height + (cells from the bottom).
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.height = rows + 1
+        self.size = rows * cols
+        self.win_shifts = (1, self.height, self.height - 1, self.height + 1)  # vertical, horizontal, diagonals
+        self.center_order = center_order(cols)
+        self.center_rank = [self.center_order.index(c) for c in range(cols)]
+
+        # Zobrist keys per player, indexed by bit position. Seeded by the
+        # board size so hashes are stable across runs and processes.
+        rng = random.Random(f"zobrist {rows}x{cols}")
+        self.zobrist = {player: [rng.getrandbits(63) for _ in range(cols * self.height)] for player in (RED, YELLOW)}
+        # The same keys indexed by mirror cell, for the hash of the left-right mirror image
+        mirror = [(cols - 1 - i // self.height) * self.height + i % self.height for i in range(cols * self.height)]
+        self.mirror_zobrist = {player: [keys[m] for m in mirror] for player, keys in self.zobrist.items()}
+
+        # Every 4-cell window, and the windows passing through each bit position
+        self.windows = window_cells(rows, cols)
+        cell_windows = [[] for _ in range(cols * self.height)]
+        for w, cells in enumerate(self.windows):
+            for r, c in cells:
+                cell_windows[self.bit_index(r, c)].append(w)
+        self.cell_windows = [tuple(windows) for windows in cell_windows]
+
+    def __reduce__(self):
+        # Pickle by size so worker processes share their own cached instance
+        return geometry, (self.rows, self.cols)
+
+    def bit_index(self, row, col):
+        """Bit position of grid cell (row, col), where row 0 is the top row like Board.grid."""
+        return col * self.height + self.rows - 1 - row
+
+    def mirror(self, bits):
+        """Reflect a bitboard left to right."""
+        column_mask = (1 << self.height) - 1
+        mirrored = 0
+        for c in range(self.cols):
+            mirrored |= ((bits >> (c * self.height)) & column_mask) << ((self.cols - 1 - c) * self.height)
+        return mirrored
+
+
+_geometries = {}
+
+
+def geometry(rows=ROWS, cols=COLS):
+    """Shared Geometry for a rows x cols board."""
+    key = (rows, cols)
+    if key not in _geometries:
+        if rows < 1 or cols < 1:
+            raise ValueError(f"invalid board size {cols}x{rows}")
+        _geometries[key] = Geometry(rows, cols)
+    return _geometries[key]
+
+
+def window_score(red, yellow):
+    """Score of one window for RED, the same rules as minimax.evaluate_window."""
+    score = 0
+    if yellow == 0:
+        if red == 3:
+            score += WEIGHT_THREE
+        elif red == 2:
+            score += WEIGHT_TWO
+        elif red == 1:
+            score += WEIGHT_ONE
+    if red == 0 and yellow == 3:
+        score += WEIGHT_OPPONENT_THREE
+    return score
+
+
+# A window's state is coded as red * 5 + yellow. Adding a piece moves the
+# code by RED_STEP or YELLOW_STEP and the score by the matching gain.
+RED_STEP = 5
+YELLOW_STEP = 1
+RED_GAIN = [0] * 25
+YELLOW_GAIN = [0] * 25
+for _red in range(5):
+    for _yellow in range(5 - _red):
+        _code = _red * RED_STEP + _yellow * YELLOW_STEP
+        if _red + _yellow < 4:
+            RED_GAIN[_code] = window_score(_red + 1, _yellow) - window_score(_red, _yellow)
+            YELLOW_GAIN[_code] = window_score(_red, _yellow + 1) - window_score(_red, _yellow)
+
+
+class Position:
+    """
+    Bitboard position: one integer mask per player plus column heights.
+    Drop-in for Board in the engine (valid_moves, make_move, undo_move,
+    check_win, copy, grid) without any rendering state. The board size
+    comes from `geometry` and defaults to utility.ROWS x utility.COLS.
+
+    Three things are updated incrementally on every move: `hash`, the
+    Zobrist hash of the pieces, `mirror_hash`, the hash of the left-right
+    mirror image, and `score`, the window heuristic for RED, backed by a
+    per-window piece count code in `windows`.
+    """
+
+    __slots__ = ("geometry", "red", "yellow", "heights", "moves", "hash", "mirror_hash", "windows", "score")
+
+    def __init__(self, rows=ROWS, cols=COLS):
+        self.geometry = geometry(rows, cols)
+        self.red = 0
+        self.yellow = 0
+        self.heights = [0] * cols
+        self.moves = 0
+        self.hash = 0
+        self.mirror_hash = 0
+        self.windows = [0] * len(self.geometry.windows)
+        self.score = 0
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Build a position from a list-of-lists grid (row 0 on top)."""
+        rows, cols = len(grid), len(grid[0])
+        position = cls(rows, cols)
+        for c in range(cols):
+            for r in range(rows - 1, -1, -1):
+                if grid[r][c] == EMPTY:
+                    break
+                position.make_move(c, grid[r][c])
+        return position
+
+    @classmethod
+    def from_moves(cls, moves, rows=ROWS, cols=COLS):
+        """Play a sequence of 0-based columns from the empty board, RED first."""
+        position = cls(rows, cols)
+        player = RED
+        for col in moves:
+            if not 0 <= col < cols or position.make_move(col, player) is None:
+                raise ValueError(f"illegal move in column {col + 1}")
+            player = YELLOW if player == RED else RED
+        return position
+
+    @property
+    def rows(self):
+        return self.geometry.rows
+
+    @property
+    def cols(self):
+        return self.geometry.cols
+
+    @property
+    def to_move(self):
+        """Player whose turn it is; RED always moves first."""
+        return RED if self.moves % 2 == 0 else YELLOW
+
+    @property
+    def grid(self):
+        """List-of-lists view of the position, matching Board.grid."""
+        geo = self.geometry
+        grid = [[EMPTY] * geo.cols for _ in range(geo.rows)]
+        for r in range(geo.rows):
+            for c in range(geo.cols):
+                bit = 1 << geo.bit_index(r, c)
+                if self.red & bit:
+                    grid[r][c] = RED
+                elif self.yellow & bit:
+                    grid[r][c] = YELLOW
+        return grid
+
+    def valid_moves(self):
+        heights = self.heights
+        rows = self.geometry.rows
+        return [c for c in range(len(heights)) if heights[c] < rows]
+
+    def is_full(self):
+        return self.moves == self.geometry.size
+
+    def make_move(self, col, player):
+        geo = self.geometry
+        height = self.heights[col]
+        if height == geo.rows:
+            return None
+        index = col * geo.height + height
+        bit = 1 << index
+        if player == RED:
+            self.red |= bit
+            gain, step = RED_GAIN, RED_STEP
+        else:
+            self.yellow |= bit
+            gain, step = YELLOW_GAIN, YELLOW_STEP
+        self.hash ^= geo.zobrist[player][index]
+        self.mirror_hash ^= geo.mirror_zobrist[player][index]
+        windows = self.windows
+        score = self.score
+        for w in geo.cell_windows[index]:
+            code = windows[w]
+            score += gain[code]
+            windows[w] = code + step
+        self.score = score
+        self.heights[col] = height + 1
+        self.moves += 1
+        return geo.rows - 1 - height, col
+
+    def undo_move(self, col):
+        geo = self.geometry
+        height = self.heights[col]
+        if height == 0:
+            return
+        height -= 1
+        index = col * geo.height + height
+        bit = 1 << index
+        if self.red & bit:
+            self.red &= ~bit
+            player, gain, step = RED, RED_GAIN, RED_STEP
+        else:
+            self.yellow &= ~bit
+            player, gain, step = YELLOW, YELLOW_GAIN, YELLOW_STEP
+        self.hash ^= geo.zobrist[player][index]
+        self.mirror_hash ^= geo.mirror_zobrist[player][index]
+        windows = self.windows
+        score = self.score
+        for w in geo.cell_windows[index]:
+            code = windows[w] - step
+            score -= gain[code]
+            windows[w] = code
+        self.score = score
+        self.heights[col] = height
+        self.moves -= 1
+
+    def is_symmetric(self):
+        """True if the position is its own left-right mirror image."""
+        if self.hash != self.mirror_hash:
+            return False
+        geo = self.geometry
+        return geo.mirror(self.red) == self.red and geo.mirror(self.yellow) == self.yellow
+
+    def check_win(self, player):
+        """True if the player has four in a row, using one shift-and-mask test per direction."""
+        bits = self.red if player == RED else self.yellow
+        for shift in self.geometry.win_shifts:
+            m = bits & (bits >> shift)
+            if m & (m >> (2 * shift)):
+                return True
+        return False
+
+    def copy(self):
+        new_position = self.__class__.__new__(self.__class__)
+        new_position.geometry = self.geometry
+        new_position.red = self.red
+        new_position.yellow = self.yellow
+        new_position.heights = self.heights[:]
+        new_position.moves = self.moves
+        new_position.hash = self.hash
+        new_position.mirror_hash = self.mirror_hash
+        new_position.windows = self.windows[:]
+        new_position.score = self.score
+        return new_position
@@ -0,0 +1,112 @@
+import time
+
+# Counters taken from minimax, in the order minimax.search_counters() returns them
+COUNTERS = ("nodes", "leaves", "cutoffs", "tt_hits", "tt_stores")
+
+
+class SearchStats:
+    """
+    Statistics for one call of best_move or iterative_deepening, read back
+    with minimax.search_stats(). Counters are deltas of the engine's
+    running totals between the start and the end of the search, and
+    `depths` has one entry per completed depth: {"depth", "seconds", "nodes",
+    "score"}, the score being the root value from RED's point of view.
+    """
+
+    def __init__(self, counters):
+        self._start = self._lap = counters
+        self.started = self._lap_time = time.perf_counter()
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.depths = []
+        self.elapsed = 0.0
+        self.from_database = False
+
+    def lap(self, depth, counters, score=None):
+        """Record a completed search depth and its root score."""
+        now = time.perf_counter()
+        self.depths.append({"depth": depth, "seconds": now - self._lap_time, "nodes": counters[0] - self._lap[0],
+                            "score": score})
+        self._lap, self._lap_time = counters, now
+
+    def finish(self, counters):
+        self.elapsed = time.perf_counter() - self.started
+        for name, end, start in zip(COUNTERS, counters, self._start):
+            setattr(self, name, end - start)
+        return self
+
+    @property
+    def depth(self):
+        return self.depths[-1]["depth"] if self.depths else 0
+
+    @property
+    def score(self):
+        """Root score of the deepest completed depth, None without one (e.g. a database move)."""
+        return self.depths[-1]["score"] if self.depths else None
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor of the deepest completed depth: nodes ** (1 / depth)."""
+        if not self.depths or self.depths[-1]["nodes"] < 1:
+            return 0.0
+        last = self.depths[-1]
+        return last["nodes"] ** (1 / last["depth"])
+
+    def as_dict(self):
+        stats = {name: getattr(self, name) for name in COUNTERS}
+        stats.update(
+            depth=self.depth,
+            score=self.score,
+            elapsed=self.elapsed,
+            nodes_per_second=self.nodes_per_second,
+            branching_factor=self.branching_factor,
+            from_database=self.from_database,
+            depths=self.depths,
+        )
+        return stats
+
+
+def timed(name, func, hooks):
+    """Wrap func so every call reports (name, seconds) to each hook."""
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in hooks:
+                hook(name, elapsed)
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+class HotPathProfile:
+    """
+    Profile hook that totals calls and time per hot path. Register it with
+    minimax.add_profile_hook and remove it again when done:
+
+        profile = HotPathProfile()
+        add_profile_hook(profile)
+        best_move(board, 8, RED)
+        remove_profile_hook(profile)
+        print(profile.report())
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def __call__(self, name, seconds):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def report(self):
+        lines = []
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            calls, seconds = self.calls[name], self.seconds[name]
+            lines.append(f"{name:<12} {calls:>10,} calls {seconds:8.3f}s {seconds / calls * 1e6:8.2f}us/call")
+        return "\n".join(lines)
@@ -0,0 +1,97 @@
+import os
+import pygame
+from utility import RED, YELLOW
+
+CELL_SIZE = 100
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Scaled sprites per cell size, loaded once and shared by every board drawn
+_sprite_cache = {}
+
+
+def load_sprites(cell_size=CELL_SIZE):
+    """Load and scale the cell and counter images once per cell size."""
+    sprites = _sprite_cache.get(cell_size)
+    if sprites is None:
+        sprites = {}
+        for name, filename in (("cell", "Cell.png"), (RED, "RedCounter.png"), (YELLOW, "YellowCounter.png")):
+            image = pygame.image.load(os.path.join(ASSET_DIR, filename))
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            sprites[name] = pygame.transform.scale(image, (cell_size, cell_size))
+        _sprite_cache[cell_size] = sprites
+    return sprites
+
+
+# Window background behind the board and the panels
+BACKGROUND_COLOR = (25, 25, 25)
+
+# Empty boards pre-composited from the cell sprite, per (rows, cols, cell size)
+_background_cache = {}
+
+# Rendered text surfaces keyed by (font, text, color); cleared when it grows past TEXT_CACHE_SIZE
+_text_cache = {}
+TEXT_CACHE_SIZE = 256
+
+
+def board_background(rows, cols, cell_size=CELL_SIZE):
+    """Surface of an empty rows x cols board, composited once and reused every frame."""
+    key = (rows, cols, cell_size)
+    surface = _background_cache.get(key)
+    if surface is None:
+        sprites = load_sprites(cell_size)
+        surface = pygame.Surface((cols * cell_size, rows * cell_size))
+        surface.fill(BACKGROUND_COLOR)
+        for r in range(rows):
+            for c in range(cols):
+                surface.blit(sprites["cell"], (c * cell_size, r * cell_size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        _background_cache[key] = surface
+    return surface
+
+
+def draw_board(screen, board, cell_size=CELL_SIZE, origin=(0, 0)):
+    """Draw the board and return the rect it covers."""
+    sprites = load_sprites(cell_size)
+    x, y = origin
+    rect = screen.blit(board_background(board.rows, board.cols, cell_size), origin)
+    grid = board.grid
+    for r in range(board.rows):
+        for c in range(board.cols):
+            if grid[r][c] in (RED, YELLOW):
+                screen.blit(sprites[grid[r][c]], (x + c * cell_size, y + r * cell_size))
+    return rect
+
+
+def render_text(font, text, color):
+    """font.render with antialiasing, cached so unchanged labels are not rendered again."""
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        if len(_text_cache) >= TEXT_CACHE_SIZE:
+            _text_cache.clear()
+        surface = _text_cache[key] = font.render(text, True, color)
+    return surface
+
+
+class DirtyRegions:
+    """
+    Tracks what each named screen region last showed. A region is redrawn
+    only when its key (any value describing its content) changes, and only
+    the rects of redrawn regions are passed to pygame.display.update.
+    """
+
+    def __init__(self):
+        self.keys = {}
+
+    def changed(self, name, key):
+        if name in self.keys and self.keys[name] == key:
+            return False
+        self.keys[name] = key
+        return True
+
+    def invalidate(self):
+        """Force every region to be redrawn, e.g. after the window was recreated."""
+        self.keys.clear()
@@ -0,0 +1,124 @@
+from array import array
+from collections import deque
+from minimax import minimax, evaluate, pick_best
+from utility import RED, YELLOW
+
+
+class SearchTree:
+    """
+    Compact record of one search, for browsing without searching again.
+
+    Nodes live in flat arrays indexed from 0 (the root): parent, move,
+    ply, exact minimax score (from RED's point of view) and the slice of
+    their children, which are stored next to each other. Boards are not
+    stored; board(node) replays the moves from the root.
+
+    Every node less than `expand_plies` deep has all its children scored,
+    and below that the best child of each node is expanded, so each
+    recorded line continues along its principal variation to the search
+    depth. Expansion stops once the tree holds max_nodes nodes.
+    """
+
+    def __init__(self, board, depth, player, expand_plies=2, max_nodes=20000):
+        self.root_board = board.copy()
+        self.depth = depth
+        self.player = player
+        self.parents = array("i", [-1])
+        self.moves = bytearray([0])
+        self.plies = bytearray([0])
+        self.scores = array("i", [self._score(self.root_board, depth, player)])
+        self.first_child = array("i", [-1])
+        self.child_counts = bytearray([0])
+        self.terminal = bytearray([self._is_terminal(self.root_board, depth)])
+        self._record(expand_plies, max_nodes)
+
+    def __len__(self):
+        return len(self.parents)
+
+    @staticmethod
+    def _is_terminal(board, remaining):
+        return remaining == 0 or board.check_win(RED) or board.check_win(YELLOW) or board.is_full()
+
+    def _score(self, board, remaining, player):
+        if self._is_terminal(board, remaining):
+            return evaluate(board)
+        return minimax(board, remaining, player == RED)
+
+    def _record(self, expand_plies, max_nodes):
+        queue = deque([0])
+        while queue and len(self) < max_nodes:
+            node = queue.popleft()
+            if self.terminal[node]:
+                continue
+            board = self.board(node)
+            player = self.player_at(node)
+            opponent = YELLOW if player == RED else RED
+            ply = self.plies[node] + 1
+            remaining = self.depth - ply
+            moves = board.valid_moves()
+            if len(self) + len(moves) > max_nodes:
+                break
+
+            self.first_child[node] = len(self)
+            self.child_counts[node] = len(moves)
+            scores = {}
+            for col in moves:
+                board.make_move(col, player)
+                scores[col] = self._score(board, remaining, opponent)
+                self.parents.append(node)
+                self.moves.append(col)
+                self.plies.append(ply)
+                self.scores.append(scores[col])
+                self.first_child.append(-1)
+                self.child_counts.append(0)
+                self.terminal.append(self._is_terminal(board, remaining))
+                board.undo_move(col)
+
+            best = pick_best(scores, player, board.geometry.center_order)
+            for child, col in enumerate(moves, self.first_child[node]):
+                if ply < expand_plies or col == best:
+                    queue.append(child)
+
+    def player_at(self, node):
+        """Side to move at node."""
+        if self.plies[node] % 2 == 0:
+            return self.player
+        return YELLOW if self.player == RED else RED
+
+    def children(self, node):
+        """Indices of the recorded children of node, empty if it was not expanded."""
+        first = self.first_child[node]
+        if first < 0:
+            return range(0)
+        return range(first, first + self.child_counts[node])
+
+    def expanded(self, node):
+        return self.first_child[node] >= 0
+
+    def path(self, node):
+        """Columns played from the root to node."""
+        moves = []
+        while node > 0:
+            moves.append(self.moves[node])
+            node = self.parents[node]
+        return moves[::-1]
+
+    def board(self, node):
+        """Fresh board of the position at node."""
+        board = self.root_board.copy()
+        player = self.player
+        for col in self.path(node):
+            board.make_move(col, player)
+            player = YELLOW if player == RED else RED
+        return board
+
+    def principal_variation(self, node=0):
+        """Columns of the best line from node, as far as it was recorded."""
+        line = []
+        while self.expanded(node):
+            children = self.children(node)
+            scores = {self.moves[child]: self.scores[child] for child in children}
+            col = pick_best(scores, self.player_at(node), self.root_board.geometry.center_order)
+            line.append(col)
+            node = next(child for child in children if self.moves[child] == col)
+        return line
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+import mcts
+from minimax import best_move, iterative_deepening, search_stats, SearchCancelled
+from parallel import parallel_best_move, parallel_iterative_deepening
+from utility import AI_WORKERS
+
+
+class SearchWorker:
+    """
+    Runs best_move on a background thread so the UI loop keeps drawing and
+    handling events while the engine thinks. Start a search, then poll()
+    once per frame until it returns the chosen column.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.stop_event = None
+        self.results = queue.Queue()
+        self.job = 0
+        self.started_at = None
+        self.depth_reached = None
+        # SearchStats of the last finished search (None for a parallel search) and its wall time
+        self.last_stats = None
+        self.last_time = None
+
+    @property
+    def busy(self):
+        return self.started_at is not None
+
+    def elapsed(self):
+        """Seconds since the current search started, or 0 when idle."""
+        return time.perf_counter() - self.started_at if self.busy else 0.0
+
+    def start(self, board, depth, player, time_ms=None, strategy="minimax"):
+        """
+        Cancel any running search and start a new one on a copy of board.
+        With time_ms, search by iterative deepening up to depth within that
+        budget instead of to a fixed depth. strategy is the search driver
+        (see minimax.STRATEGIES) or "mcts"; parallel minimax searches always
+        use plain alpha-beta.
+        """
+        self.cancel()
+        self.job += 1
+        self.stop_event = threading.Event()
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(
+            target=self._run, args=(self.job, board.copy(), depth, player, time_ms, strategy, self.stop_event),
+            daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, job, board, depth, player, time_ms, strategy, stop_event):
+        try:
+            if strategy == "mcts":
+                col = mcts.best_move(board, depth, player, time_ms=time_ms, workers=AI_WORKERS,
+                                     stop_event=stop_event)
+                stats = None
+            elif AI_WORKERS == 1 and time_ms is not None:
+                col, depth = iterative_deepening(board, player, time_ms=time_ms, max_depth=depth,
+                                                 stop_event=stop_event, strategy=strategy)
+                stats = search_stats()
+            elif AI_WORKERS == 1:
+                col = best_move(board, depth, player, stop_event=stop_event, strategy=strategy)
+                stats = search_stats()
+            elif time_ms is not None:
+                col, depth = parallel_iterative_deepening(board, player, time_ms, depth, AI_WORKERS, stop_event)
+                stats = None
+            else:
+                # Node counts stay in the worker processes
+                col = parallel_best_move(board, depth, player, AI_WORKERS, stop_event)
+                stats = None
+        except SearchCancelled:
+            return
+        self.results.put((job, col, depth, stats))
+
+    def poll(self):
+        """Return the column found by the current search, or None if it is still running."""
+        while True:
+            try:
+                job, col, depth, stats = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if job == self.job and self.busy:
+                self.last_time = self.elapsed()
+                self.started_at = None
+                self.depth_reached = depth
+                self.last_stats = stats
+                return col
+
+    def cancel(self):
+        """Stop the running search, if any, and wait for its thread to exit."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.started_at = None
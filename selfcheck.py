@@ -0,0 +1,158 @@
+"""
+Differential checks of the fast engine paths against their reference
+implementations on random positions. Run with: python selfcheck.py
+"""
+import os
+import random
+import sys
+import tempfile
+from position import Position
+from game_record import GameRecord, MAX_SIZE, append_game, read_games
+from minimax import evaluate_grid, verify_best_move, best_move, clear_cache
+from utility import ROWS, COLS, RED, YELLOW, EMPTY, string_to_moves
+
+
+def random_position(rng, max_moves, rows=ROWS, cols=COLS):
+    """Play random moves from the empty board, stopping early at a win."""
+    position = Position(rows, cols)
+    player = RED
+    for _ in range(rng.randrange(max_moves + 1)):
+        if position.check_win(RED) or position.check_win(YELLOW) or position.is_full():
+            break
+        position.make_move(rng.choice(position.valid_moves()), player)
+        player = YELLOW if player == RED else RED
+    return position, player
+
+
+def check_incremental_evaluation(count=2000, seed=0, rows=ROWS, cols=COLS):
+    """The incrementally maintained score must equal a full rescan, after moves and undos."""
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        position, player = random_position(rng, rows * cols, rows, cols)
+        if position.score != evaluate_grid(position.grid):
+            failures += 1
+        moves = position.valid_moves()
+        if moves:
+            col = rng.choice(moves)
+            before = position.score
+            position.make_move(col, player)
+            if position.score != evaluate_grid(position.grid):
+                failures += 1
+            position.undo_move(col)
+            if position.score != before:
+                failures += 1
+    return failures
+
+
+def check_batch_evaluation(count=2000, seed=0, rows=ROWS, cols=COLS):
+    """batch_eval.evaluate_batch must agree with evaluate() position by position."""
+    from batch_eval import evaluate_batch, to_array
+    from minimax import evaluate
+
+    rng = random.Random(seed)
+    positions = [random_position(rng, rows * cols, rows, cols)[0] for _ in range(count)]
+    scores = evaluate_batch(to_array(positions))
+    return sum(1 for position, score in zip(positions, scores) if evaluate(position) != score)
+
+
+def check_pruned_search(count=100, max_depth=6, seed=0, rows=ROWS, cols=COLS):
+    """Alpha-beta best_move must pick the same column as plain minimax."""
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        position, player = random_position(rng, rows * cols // 2, rows, cols)
+        if position.check_win(RED) or position.check_win(YELLOW) or position.is_full():
+            continue
+        clear_cache()
+        pruned, plain = verify_best_move(position, rng.randint(1, max_depth), player)
+        if pruned != plain:
+            failures += 1
+    return failures
+
+
+def check_strategies(count=60, max_depth=6, seed=0, rows=ROWS, cols=COLS):
+    """PVS and MTD(f) must pick the same column as plain minimax."""
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        position, player = random_position(rng, rows * cols // 2, rows, cols)
+        if position.check_win(RED) or position.check_win(YELLOW) or position.is_full():
+            continue
+        depth = rng.randint(1, max_depth)
+        plain = best_move(position, depth, player, pruning=False)
+        for strategy in ("pvs", "mtdf"):
+            clear_cache()
+            if best_move(position, depth, player, use_database=False, strategy=strategy) != plain:
+                failures += 1
+    return failures
+
+
+def check_either_side(count=60, max_depth=6, seed=0, rows=ROWS, cols=COLS):
+    """
+    Searching a position for the side not to move, with the table left
+    warm, must not change the result for the side to move (or vice versa).
+    """
+    rng = random.Random(seed)
+    failures = 0
+    clear_cache()
+    for _ in range(count):
+        position, player = random_position(rng, rows * cols // 2, rows, cols)
+        if position.check_win(RED) or position.check_win(YELLOW) or position.is_full():
+            continue
+        depth = rng.randint(1, max_depth)
+        for side in (YELLOW if player == RED else RED, player):
+            plain = best_move(position, depth, side, pruning=False)
+            for strategy in ("minimax", "mtdf"):
+                if best_move(position, depth, side, use_database=False, strategy=strategy) != plain:
+                    failures += 1
+    return failures
+
+
+def check_game_records(count=50, seed=0, widths=(7, 16, 17, MAX_SIZE)):
+    """
+    Random move lists on boards of each width must read back from a game
+    file unchanged, as columns and as move strings, on both sides of
+    NIBBLE_COLS. Boards wider than MAX_SIZE (36 columns and up) must be
+    refused.
+    """
+    rng = random.Random(seed)
+    failures = 0
+    games = [(cols, [rng.randrange(cols) for _ in range(rng.randrange(60))]) for cols in widths for _ in range(count)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.c4g")
+        for cols, moves in games:
+            append_game(path, GameRecord.from_moves(ROWS, cols, moves, EMPTY))
+        records = list(read_games(path))
+        failures += abs(len(records) - len(games))
+        for (cols, moves), record in zip(games, records):
+            if record.cols != cols or record.moves != moves or string_to_moves(record.move_string()) != moves:
+                failures += 1
+    for cols in (MAX_SIZE + 1, 40):
+        try:
+            GameRecord.from_moves(ROWS, cols, [], EMPTY)
+            failures += 1
+        except ValueError:
+            pass
+    return failures
+
+
+if __name__ == "__main__":
+    results = {
+        "incremental evaluation": check_incremental_evaluation(),
+        "incremental evaluation 7x6": check_incremental_evaluation(rows=6, cols=7),
+        "pruned search": check_pruned_search(),
+        "pruned search 7x6": check_pruned_search(count=30, max_depth=4, rows=6, cols=7),
+        "pvs and mtdf": check_strategies(),
+        "pvs and mtdf 7x6": check_strategies(count=20, max_depth=4, rows=6, cols=7),
+        "either side to move": check_either_side(),
+        "game records": check_game_records(),
+    }
+    try:
+        results["batch evaluation"] = check_batch_evaluation()
+        results["batch evaluation 7x6"] = check_batch_evaluation(rows=6, cols=7)
+    except ImportError:
+        print("batch evaluation: skipped (numpy not installed)")
+    for name, failures in results.items():
+        print(f"{name}: {'ok' if failures == 0 else f'{failures} mismatches'}")
+    sys.exit(1 if any(results.values()) else 0)
@@ -0,0 +1,245 @@
+"""
+Local analysis server speaking JSON lines over TCP or a Unix socket.
+
+    python server.py --port 8765 --workers 4
+    python server.py --unix /tmp/connect4.sock
+
+Each request is one JSON object per line:
+    {"id": 1, "op": "best_move", "moves": "3324", "depth": 8}
+    {"id": 2, "op": "scores", "moves": "", "rows": 6, "cols": 7, "depth": 6}
+    {"id": 3, "op": "best_move", "moves": "33", "time_ms": 200}
+    {"id": 4, "op": "stats"}
+
+"moves" is a move string as used by the tournament runner ("1" is the
+leftmost column). rows and cols default to the configured board size and
+depth to AI_PLAYER1_DEPTH. With time_ms, either op searches by iterative
+deepening up to the depth and answers from the deepest depth finished
+within the budget; without it the search runs to the full depth however
+long that takes. Each response is one line with the request's id, in the
+order the searches finish:
+    {"id": 1, "ok": true, "col": 1, "depth": 8, "cached": false}
+    {"id": 2, "ok": true, "scores": [4, 6, 7, 6, 4], "depth": 6, "cached": false}
+    {"id": 9, "ok": false, "error": "overloaded"}
+
+"scores" holds one score per column from RED's point of view, with null
+for full columns.
+
+Searches run in a process pool. A request identical to one still being
+searched waits for that search instead of starting another, and recent
+results are served from an LRU cache. When more than --max-pending
+distinct searches are queued, new ones are rejected with "overloaded".
+Each connection may have --per-connection requests outstanding; past that
+the server stops reading from it, so TCP pushes back on the client.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import minimax
+from position import Position
+from utility import ROWS, COLS, RED, YELLOW, AI_PLAYER1_DEPTH, MOVE_CHARS, string_to_moves
+
+OPS = ("best_move", "scores", "stats")
+MAX_DEPTH = 20
+MAX_TIME_MS = 60000
+# Board sizes accepted: at least four in a row must fit, and moves must be writable as a move string
+MIN_SIZE, MAX_SIZE = 4, len(MOVE_CHARS)
+
+
+class RequestError(Exception):
+    """A request the server refuses; the message is sent back as the error."""
+
+
+def analyse(op, moves, rows, cols, depth, time_ms):
+    """Runs in a worker process: the search behind one request."""
+    board = Position.from_moves(moves, rows, cols)
+    player = board.to_move
+    if op == "scores":
+        if time_ms is not None:
+            scores, depth = minimax.iterative_column_scores(board, player, time_ms=time_ms, max_depth=depth)
+        else:
+            scores = minimax.column_scores(board, depth, player)
+        return {"scores": [scores.get(col) for col in range(cols)], "depth": depth}
+    if time_ms is not None:
+        col, depth = minimax.iterative_deepening(board, player, time_ms=time_ms, max_depth=depth)
+    else:
+        col = minimax.best_move(board, depth, player)
+    return {"col": col, "depth": depth}
+
+
+def parse_request(request):
+    """Validate a decoded request and return its search key (op, moves, rows, cols, depth, time_ms)."""
+    if not isinstance(request, dict):
+        raise RequestError("request must be a JSON object")
+    op = request.get("op")
+    if op not in OPS:
+        raise RequestError(f"unknown op {op!r}, expected one of {', '.join(OPS)}")
+    if op == "stats":
+        return (op,)
+    try:
+        rows = int(request.get("rows", ROWS))
+        cols = int(request.get("cols", COLS))
+        depth = int(request.get("depth", AI_PLAYER1_DEPTH))
+        time_ms = request.get("time_ms")
+        time_ms = None if time_ms is None else int(time_ms)
+        moves = tuple(string_to_moves(str(request.get("moves", ""))))
+    except (TypeError, ValueError) as error:
+        raise RequestError(str(error)) from None
+    if not (MIN_SIZE <= rows <= MAX_SIZE and MIN_SIZE <= cols <= MAX_SIZE):
+        raise RequestError(f"rows and cols must be between {MIN_SIZE} and {MAX_SIZE}")
+    try:
+        board = Position.from_moves(moves, rows, cols)
+    except ValueError as error:
+        raise RequestError(str(error)) from None
+    if not 1 <= depth <= MAX_DEPTH:
+        raise RequestError(f"depth must be between 1 and {MAX_DEPTH}")
+    if time_ms is not None and not 1 <= time_ms <= MAX_TIME_MS:
+        raise RequestError(f"time_ms must be between 1 and {MAX_TIME_MS}")
+    if board.check_win(RED) or board.check_win(YELLOW) or board.is_full():
+        raise RequestError("the game is already over")
+    return op, moves, rows, cols, depth, time_ms
+
+
+class AnalysisServer:
+    """Request handling shared by every connection: pool, in-flight searches and result cache."""
+
+    def __init__(self, workers=None, cache_size=4096, max_pending=256, per_connection=32):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.workers = self.pool._max_workers
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.in_flight = {}
+        self.max_pending = max_pending
+        self.per_connection = per_connection
+        self.counters = {"requests": 0, "searches": 0, "cache_hits": 0, "coalesced": 0, "rejected": 0,
+                         "errors": 0}
+
+    def stats(self):
+        return dict(self.counters, in_flight=len(self.in_flight), cached=len(self.cache), workers=self.workers)
+
+    async def handle(self, request):
+        """Answer one decoded request with a response dict (without the id)."""
+        self.counters["requests"] += 1
+        key = parse_request(request)
+        if key[0] == "stats":
+            return self.stats()
+
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.counters["cache_hits"] += 1
+            return dict(result, cached=True)
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                self.counters["rejected"] += 1
+                raise RequestError("overloaded")
+            future = asyncio.get_running_loop().run_in_executor(self.pool, analyse, *key)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+            self.counters["searches"] += 1
+        # Shielded so a client that goes away does not cancel a search others wait on
+        result = await asyncio.shield(future)
+        return dict(result, cached=False)
+
+    def _finished(self, key, future):
+        del self.in_flight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.cache[key] = future.result()
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def _respond(self, line, writer, lock, slots):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get("id")
+            response = dict(await self.handle(request), ok=True)
+        except (RequestError, json.JSONDecodeError) as error:
+            response = {"ok": False, "error": str(error)}
+        except Exception as error:
+            self.counters["errors"] += 1
+            response = {"ok": False, "error": f"internal error: {error}"}
+        finally:
+            slots.release()
+        response["id"] = request_id
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def client(self, reader, writer):
+        """Serve one connection until it closes."""
+        lock = asyncio.Lock()
+        slots = asyncio.Semaphore(self.per_connection)
+        tasks = set()
+        try:
+            while True:
+                await slots.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    slots.release()
+                    continue
+                task = asyncio.create_task(self._respond(line, writer, lock, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(args):
+    server = AnalysisServer(args.workers, args.cache_size, args.max_pending, args.per_connection)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.client, path=args.unix)
+        where = args.unix
+    else:
+        listener = await asyncio.start_server(server.client, args.host, args.port)
+        where = f"{args.host}:{args.port}"
+    print(f"serving on {where} with {server.workers} workers", file=sys.stderr, flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Connect Four analysis server",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: one per CPU)")
+    parser.add_argument("--cache-size", type=int, default=4096, help="recent results kept")
+    parser.add_argument("--max-pending", type=int, default=256, help="distinct searches queued before rejecting")
+    parser.add_argument("--per-connection", type=int, default=32, help="outstanding requests per connection")
+    args = parser.parse_args(argv)
+    # Stop on SIGTERM like on Ctrl+C, so the pool is shut down and the socket file removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Headless self-play tournaments between engine configurations.
+
+    python tournament.py --games 1000 --engine1 depth=8 --engine2 depth=4 --random-plies 2
+
+An engine is a comma-separated list of settings:
+    depth=N      search depth (with time=, the maximum depth)
+    time=MS      per-move time budget, searched by iterative deepening
+    nodes=N      per-move node budget, searched by iterative deepening (not for mcts)
+    eval=NAME    static evaluator from minimax.EVALUATORS (default window, not for mcts)
+    strategy=S   search driver from minimax.STRATEGIES, or mcts (default minimax)
+    playouts=N   per-move playout budget for strategy=mcts
+    db=0|1       consult the perfect-play database (default 0, so every move is searched)
+    name=TEXT    label used in the report
+
+Games run in a process pool. Each opening is played twice, once with each
+engine as Red. Results stream to stdout as games finish. With --tt-cache,
+every worker shares a persistent transposition cache file and flushes its
+new results into it after each game.
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mcts
+import minimax
+from position import Position
+from utility import ROWS, COLS, RED, YELLOW, AI_PLAYER1_DEPTH, moves_to_string, string_to_moves
+
+
+class Engine:
+    """One engine configuration, parsed from a spec like "depth=6,eval=window"."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.depth = None
+        self.time_ms = None
+        self.nodes = None
+        self.evaluator = "window"
+        self.strategy = "minimax"
+        self.playouts = None
+        self.tree = None
+        self.use_database = False
+        self.name = spec
+        keys = set()
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            key, _, value = item.partition("=")
+            keys.add(key)
+            if key == "depth":
+                self.depth = int(value)
+            elif key == "time":
+                self.time_ms = int(value)
+            elif key == "nodes":
+                self.nodes = int(value)
+            elif key == "eval":
+                if value not in minimax.EVALUATORS:
+                    raise ValueError(f"unknown evaluator {value!r}")
+                self.evaluator = value
+            elif key == "strategy":
+                if value not in minimax.STRATEGIES and value != "mcts":
+                    raise ValueError(f"unknown strategy {value!r}")
+                self.strategy = value
+            elif key == "playouts":
+                self.playouts = int(value)
+            elif key == "db":
+                self.use_database = value not in ("0", "false", "no")
+            elif key == "name":
+                self.name = value
+            else:
+                raise ValueError(f"unknown engine setting {key!r} in {spec!r}")
+        if self.strategy == "mcts" and keys & {"nodes", "eval"}:
+            raise ValueError(f"nodes= and eval= do not apply to strategy=mcts in {spec!r}, use playouts=")
+        if self.depth is None and self.time_ms is None and self.nodes is None and self.playouts is None:
+            self.depth = AI_PLAYER1_DEPTH
+        if self.strategy == "mcts":
+            self.tree = mcts.MCTS()
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def unit(self):
+        """What the work counter counts."""
+        return "playouts" if self.strategy == "mcts" else "nodes"
+
+    def work_done(self):
+        """Running total of nodes searched, or playouts for MCTS."""
+        return mcts.playout_count if self.strategy == "mcts" else minimax.node_count
+
+    def choose_move(self, board, player):
+        """Pick a column; returns (col, depth searched)."""
+        if self.strategy == "mcts":
+            col = mcts.best_move(board, self.depth or 0, player, self.playouts, self.time_ms, tree=self.tree)
+            return col, None
+        minimax.set_evaluator(self.evaluator)
+        if self.time_ms is not None or self.nodes is not None:
+            return minimax.iterative_deepening(board, player, time_ms=self.time_ms, max_nodes=self.nodes,
+                                               max_depth=self.depth, use_database=self.use_database,
+                                               strategy=self.strategy)
+        col = minimax.best_move(board, self.depth, player, use_database=self.use_database, strategy=self.strategy)
+        return col, self.depth
+
+
+def random_opening(rng, plies, rows, cols):
+    """Random moves that neither win nor fill the board."""
+    position = Position(rows, cols)
+    moves = []
+    for _ in range(plies):
+        player = position.to_move
+        candidates = []
+        for col in position.valid_moves():
+            position.make_move(col, player)
+            if not position.check_win(player) and not position.is_full():
+                candidates.append(col)
+            position.undo_move(col)
+        if not candidates:
+            break
+        col = rng.choice(candidates)
+        position.make_move(col, player)
+        moves.append(col)
+    return moves
+
+
+def play_game(game, engines, opening, rows, cols):
+    """
+    Play one game in a worker process. Engine `game % 2` plays Red.
+    Returns a dict with the result and per-engine timing and node counts.
+    """
+    red_index = game % 2
+    by_player = {RED: red_index, YELLOW: 1 - red_index}
+    board = Position.from_moves(opening, rows, cols)
+    moves = list(opening)
+    stats = [{"moves": 0, "time": 0.0, "nodes": 0} for _ in engines]
+    for engine in engines:
+        minimax.set_evaluator(engine.evaluator)
+        minimax.clear_cache()
+        if engine.tree is not None:
+            engine.tree.reset()
+
+    winner = None
+    while True:
+        player = board.to_move
+        index = by_player[player]
+        start_nodes = engines[index].work_done()
+        start = time.perf_counter()
+        col, _ = engines[index].choose_move(board, player)
+        stats[index]["time"] += time.perf_counter() - start
+        stats[index]["nodes"] += engines[index].work_done() - start_nodes
+        stats[index]["moves"] += 1
+
+        board.make_move(col, player)
+        moves.append(col)
+        if board.check_win(player):
+            winner = player
+            break
+        if board.is_full():
+            break
+
+    minimax.flush_persistent_cache()
+
+    if winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if by_player[winner] == 0 else 0.0
+    return {
+        "game": game,
+        "red": red_index,
+        "winner": winner,
+        "engine1_score": score,
+        "moves": moves_to_string(moves),
+        "stats": stats,
+    }
+
+
+class Summary:
+    """Running totals from engine 1's point of view."""
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.games = 0
+        self.wins = self.draws = self.losses = 0
+        self.moves = [0, 0]
+        self.time = [0.0, 0.0]
+        self.nodes = [0, 0]
+        self.started = time.perf_counter()
+
+    def add(self, result):
+        self.games += 1
+        if result["engine1_score"] == 1.0:
+            self.wins += 1
+        elif result["engine1_score"] == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+        for i, stats in enumerate(result["stats"]):
+            self.moves[i] += stats["moves"]
+            self.time[i] += stats["time"]
+            self.nodes[i] += stats["nodes"]
+
+    def line(self, total):
+        elapsed = time.perf_counter() - self.started
+        parts = [f"games {self.games}/{total}", f"{self.engines[0]} W/D/L {self.wins}/{self.draws}/{self.losses}"]
+        for i, engine in enumerate(self.engines):
+            latency = self.time[i] / self.moves[i] * 1000 if self.moves[i] else 0.0
+            nps = self.nodes[i] / self.time[i] if self.time[i] else 0.0
+            parts.append(f"{engine}: {latency:.1f}ms/move {nps:,.0f} {engine.unit}/s")
+        parts.append(f"{self.games / elapsed:.2f} games/s")
+        return " | ".join(parts)
+
+
+def openings(args, rng):
+    """One opening per pair of games, from the book file or random."""
+    if args.book:
+        with open(args.book) as f:
+            book = [string_to_moves(line) for line in f if line.strip() and not line.startswith("#")]
+        return [book[i % len(book)] for i in range((args.games + 1) // 2)]
+    return [random_opening(rng, args.random_plies, args.rows, args.cols) for _ in range((args.games + 1) // 2)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine tournament",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("--engine1", default=f"depth={AI_PLAYER1_DEPTH}")
+    parser.add_argument("--engine2", default=f"depth={AI_PLAYER1_DEPTH}")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--random-plies", type=int, default=2, help="random opening moves per game")
+    parser.add_argument("--book", help="file of opening move strings, one per line")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jsonl", help="also write every game result to this JSONL file")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    parser.add_argument("--tt-cache", help="persistent transposition cache file shared by the workers")
+    args = parser.parse_args(argv)
+
+    engines = [Engine(args.engine1), Engine(args.engine2)]
+    if engines[0].name == engines[1].name:
+        engines[0].name, engines[1].name = f"1:{engines[0]}", f"2:{engines[1]}"
+    rng = random.Random(args.seed)
+    game_openings = openings(args, rng)
+    summary = Summary(engines)
+    out = open(args.jsonl, "w") if args.jsonl else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=minimax.open_persistent_cache,
+                                 initargs=(args.tt_cache,)) as pool:
+            futures = [pool.submit(play_game, game, engines, game_openings[game // 2], args.rows, args.cols)
+                       for game in range(args.games)]
+            for future in as_completed(futures):
+                result = future.result()
+                summary.add(result)
+                if out:
+                    out.write(json.dumps(result) + "\n")
+                if not args.quiet:
+                    print(summary.line(args.games), flush=True)
+    finally:
+        if out:
+            out.close()
+
+    if args.quiet:
+        print(summary.line(args.games))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import random
+from array import array
+
+NO_MOVE = 255
+
+# Bytes used per slot: key (8), value (4), depth, flag, move, age (1 each)
+ENTRY_BYTES = 16
+
+# Mixed into the position hash so each (position, depth) pair has its own slot
+_rng = random.Random(0xDEC0DE)
+DEPTH_KEYS = [_rng.getrandbits(63) for _ in range(256)]
+# Mixed into the hash of positions searched with RED to move. A search may be asked for
+# either side whatever the piece count, and the two must not share entries.
+SIDE_KEY = _rng.getrandbits(63)
+
+
+class TranspositionTable:
+    """
+    Fixed-capacity transposition table keyed by Zobrist hash and depth.
+
+    Slots live in flat arrays sized from max_bytes and are grouped in
+    buckets of two. A store replaces a bucket slot in this order: the same
+    entry, an empty slot, an entry left over from an older search, then the
+    shallower of the two, so deep results from the current search survive.
+    """
+
+    def __init__(self, max_bytes):
+        size = 2
+        while size * 2 * ENTRY_BYTES <= max_bytes:
+            size *= 2
+        self.size = size
+        self.mask = size - 2
+        self.keys = array("q", bytes(8 * size))
+        self.values = array("i", bytes(4 * size))
+        self.depths = bytearray(size)
+        self.flags = bytearray(size)
+        self.moves = bytearray(size)
+        self.ages = bytearray(size)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def _find(self, key):
+        i = key & self.mask
+        if self.keys[i] == key:
+            return i
+        if self.keys[i + 1] == key:
+            return i + 1
+        return -1
+
+    def probe(self, position_hash, depth):
+        """Return (flag, value, move) for a stored entry, or None."""
+        i = self._find(position_hash ^ DEPTH_KEYS[depth])
+        if i < 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        move = self.moves[i]
+        return self.flags[i], self.values[i], None if move == NO_MOVE else move
+
+    def store(self, position_hash, depth, flag, value, move):
+        key = position_hash ^ DEPTH_KEYS[depth]
+        i = self._find(key)
+        if i < 0:
+            i = self._replacement_slot(key & self.mask)
+            if self.keys[i]:
+                self.overwrites += 1
+        self.keys[i] = key
+        self.values[i] = value
+        self.depths[i] = depth
+        self.flags[i] = flag
+        self.moves[i] = NO_MOVE if move is None else move
+        self.ages[i] = self.generation
+        self.stores += 1
+
+    def _replacement_slot(self, i):
+        keys, ages, depths = self.keys, self.ages, self.depths
+        for slot in (i, i + 1):
+            if not keys[slot]:
+                return slot
+        first_stale = ages[i] != self.generation
+        second_stale = ages[i + 1] != self.generation
+        if first_stale != second_stale:
+            return i if first_stale else i + 1
+        return i if depths[i] <= depths[i + 1] else i + 1
+
+    def new_search(self):
+        """Age existing entries so the next search may replace them first."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        size = self.size
+        self.keys = array("q", bytes(8 * size))
+        self.values = array("i", bytes(4 * size))
+        self.depths = bytearray(size)
+        self.flags = bytearray(size)
+        self.moves = bytearray(size)
+        self.ages = bytearray(size)
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.overwrites = 0
+
+    def stats(self):
+        return {
+            "capacity": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
@@ -1,13 +1,21 @@
 import pygame
 import math
 from board import Board
-from minimax import minimax, evaluate
+from minimax import minimax, evaluate, iterative_deepening
+from search_tree import SearchTree
+from renderer import render_text, BACKGROUND_COLOR
 from utility import RED, YELLOW, AI_PLAYER1_DEPTH
 
+# Children drawn at once; on wider boards the row scrolls to keep the selected child in view
+MAX_VISIBLE_CHILDREN = 7
+
 
 class TreeNode:
     """Represents a node in the minimax tree - lazy loading with genuine eval"""
 
+    # Every node can be expanded by searching it
+    recorded = True
+
     def __init__(self, board, depth, player, move_col=None, parent=None, max_depth=6):
         self.board = board.copy()
         self.depth = depth
@@ -44,6 +52,41 @@ class TreeNode:
         return self.children
 
 
+class RecordedNode:
+    """
+    TreeNode interface over one node of a SearchTree. Views are created as
+    the user navigates, and boards are rebuilt from the tree on demand.
+    """
+
+    def __init__(self, tree, index=0, parent=None):
+        self.tree = tree
+        self.index = index
+        self.parent = parent
+        self.depth = tree.plies[index]
+        self.player = tree.player_at(index)
+        self.move_col = tree.moves[index] if parent else None
+        self.score = tree.scores[index]
+        self.is_terminal = bool(tree.terminal[index])
+        self.children = None
+        self._board = None
+
+    @property
+    def board(self):
+        if self._board is None:
+            self._board = self.tree.board(self.index)
+        return self._board
+
+    @property
+    def recorded(self):
+        """False for a node whose children the search did not record."""
+        return self.is_terminal or self.tree.expanded(self.index)
+
+    def load_children(self):
+        if self.children is None:
+            self.children = [RecordedNode(self.tree, child, self) for child in self.tree.children(self.index)]
+        return self.children
+
+
 def draw_arrow(surface, color, start, end, width=3):
     """Draw an arrow from start to end"""
     dx, dy = end[0] - start[0], end[1] - start[1]
@@ -58,123 +101,181 @@ def draw_arrow(surface, color, start, end, width=3):
 
 
 class TreeVisualizer:
-    def __init__(self, root_board, depth, starting_player):
+    def __init__(self, root_board, depth, starting_player, time_ms=None, recorded=True):
+        """
+        With time_ms, show the tree to the depth the engine reaches within that budget.
+        By default the tree is recorded by one search up front (see SearchTree) and
+        browsing it never searches; recorded=False searches every node as it is opened.
+        """
+        if time_ms is not None:
+            # Without the database, so the depth is one the search really reached in time
+            _, depth = iterative_deepening(root_board, starting_player, time_ms=time_ms, max_depth=depth,
+                                           use_database=False)
+
         self.screen = pygame.display.set_mode((1000, 600))
         pygame.display.set_caption("Minimax Tree Visualization")
         self.font = pygame.font.Font(None, 24)
         self.small_font = pygame.font.Font(None, 18)
 
-        self.root = TreeNode(root_board, 0, starting_player, max_depth=depth)
+        if recorded:
+            self.root = RecordedNode(SearchTree(root_board, depth, starting_player))
+        else:
+            self.root = TreeNode(root_board, 0, starting_player, max_depth=depth)
         self.current_node = self.root
+        # Index of the highlighted child, opened with Enter
+        self.selected = 0
 
     def move_to_parent(self):
         if self.current_node.parent:
-            self.current_node = self.current_node.parent
+            node = self.current_node
+            self.current_node = node.parent
+            self.selected = self.current_node.load_children().index(node)
 
     def move_to_child(self, index):
         children = self.current_node.load_children()
         if index < len(children):
             self.current_node = children[index]
+            self.selected = 0
+
+    def select(self, step):
+        """Move the highlight step children to the right (left if negative)."""
+        children = self.current_node.load_children()
+        if children:
+            self.selected = max(0, min(len(children) - 1, self.selected + step))
 
     def draw_board(self, board, x, y, size):
-        cell_size = size // 5
-        for r in range(4):
-            for c in range(5):
+        """Draw a miniature board `size` pixels wide."""
+        cell_size = size // board.cols
+        grid = board.grid
+        for r in range(board.rows):
+            for c in range(board.cols):
                 rect = pygame.Rect(x + c * cell_size, y + r * cell_size, cell_size, cell_size)
                 pygame.draw.rect(self.screen, (240, 240, 240), rect)
                 pygame.draw.rect(self.screen, (100, 100, 100), rect, 1)
-                if board.grid[r][c] == RED:
+                if grid[r][c] == RED:
                     pygame.draw.circle(self.screen, (220, 50, 50),
                                        (x + c * cell_size + cell_size // 2, y + r * cell_size + cell_size // 2),
                                        cell_size // 3)
-                elif board.grid[r][c] == YELLOW:
+                elif grid[r][c] == YELLOW:
                     pygame.draw.circle(self.screen, (255, 215, 0),
                                        (x + c * cell_size + cell_size // 2, y + r * cell_size + cell_size // 2),
                                        cell_size // 3)
 
+    def draw(self):
+        """Draw the current node, its parent and its children."""
+        self.screen.fill(BACKGROUND_COLOR)
+
+        board_x, board_y = 50, 100
+        self.draw_board(self.current_node.board, board_x, board_y, 200)
+        self.screen.blit(render_text(self.font, "CURRENT NODE", (255, 255, 255)), (board_x + 40, 60))
+
+        info_x, info_y = board_x + 220, board_y + 20
+        p_name = 'RED' if self.current_node.player == RED else 'YELLOW'
+        strategy = "(Maximizing)" if self.current_node.player == RED else "(Minimizing)"
+        p_color = (255, 100, 100) if self.current_node.player == RED else (255, 215, 0)
+
+        self.screen.blit(render_text(self.font, f"Depth: {self.current_node.depth}", (200, 200, 200)),
+                         (info_x, info_y))
+        self.screen.blit(render_text(self.font, f"Player: {p_name}", p_color), (info_x, info_y + 30))
+        self.screen.blit(render_text(self.small_font, strategy, (150, 150, 150)), (info_x + 140, info_y + 35))
+
+        score = self.current_node.score
+        eval_color = (200, 200, 200)
+        if (self.current_node.player == RED and score > 0) or (self.current_node.player == YELLOW and score < 0):
+            eval_color = (100, 255, 100)
+        elif (self.current_node.player == RED and score < 0) or (self.current_node.player == YELLOW and score > 0):
+            eval_color = (255, 100, 100)
+
+        self.screen.blit(render_text(self.font, f"Evaluation: {score}", eval_color), (info_x, info_y + 60))
+        if self.current_node.is_terminal:
+            status_text = "Leaf Node"
+        elif not self.current_node.recorded:
+            status_text = "Not recorded"
+        else:
+            status_text = "Child Node"
+        self.screen.blit(render_text(self.font, f"Status: {status_text}", (100, 200, 255)), (info_x, info_y + 90))
+
+        if self.current_node.parent:
+            px, py = board_x + 600, board_y
+            self.screen.blit(render_text(self.font, "PARENT", (100, 150, 255)), (px + 60, py - 25))
+            self.draw_board(self.current_node.parent.board, px, py, 150)
+            draw_arrow(self.screen, (100, 150, 255), (px - 50, py - 20), (board_x + 200, board_y - 30), 4)
+            self.screen.blit(
+                render_text(self.small_font, f"Eval: {self.current_node.parent.score}", (100, 255, 100)),
+                (px + 160, py + 60))
+
+        children = self.current_node.load_children()
+        if children:
+            cy = board_y + 250
+            self.screen.blit(render_text(self.font, "CHILDREN", (255, 150, 100)), (50, cy - 30))
+            num_c = len(children)
+            first = max(0, min(self.selected - MAX_VISIBLE_CHILDREN // 2, num_c - MAX_VISIBLE_CHILDREN))
+            visible = children[first:first + MAX_VISIBLE_CHILDREN]
+            total_w = min(len(visible) * 160, 900)
+            start_x = (1000 - total_w) // 2
+            spacing = total_w // len(visible)
+            child_size = min(110, spacing - 20)
+            if first > 0:
+                self.screen.blit(render_text(self.font, "<", (255, 150, 100)), (start_x - 20, cy + 80))
+            if first + len(visible) < num_c:
+                self.screen.blit(render_text(self.font, ">", (255, 150, 100)), (start_x + total_w + 10, cy + 80))
+
+            for i, child in enumerate(visible, first):
+                cx, c_y = start_x + (i - first) * spacing + 40, cy + 40
+                self.draw_board(child.board, cx, c_y, child_size)
+                if i == self.selected:
+                    cell = child_size // child.board.cols
+                    pygame.draw.rect(self.screen, (255, 150, 100),
+                                     (cx - 4, c_y - 4, cell * child.board.cols + 8, cell * child.board.rows + 8), 2)
+                draw_arrow(self.screen, (255, 150, 100), (board_x + 100, board_y + 165), (cx + 25, c_y - 55), 3)
+
+                self.screen.blit(render_text(self.font, f"Col {child.move_col + 1}", (255, 255, 255)),
+                                 (cx + 25, c_y - 50))
+                key_hint = f"Press {i + 1}" if i < 9 else "Enter"
+                self.screen.blit(render_text(self.small_font, key_hint, (150, 150, 255)),
+                                 (cx + 25, c_y - 25))
+                self.screen.blit(render_text(self.small_font, f"Eval: {child.score}", (255, 255, 255)),
+                                 (cx + 10, c_y + 120))
+
+        pygame.draw.rect(self.screen, (40, 40, 40), (0, 540, 1000, 60))
+        pygame.draw.line(self.screen, (100, 100, 100), (0, 540), (1000, 540), 2)
+        self.screen.blit(render_text(self.font, "CONTROLS:", (255, 255, 255)), (20, 550))
+
+        up_txt = "UP ARROW = Go to parent" if self.current_node.parent else "UP ARROW = (No parent)"
+        self.screen.blit(
+            render_text(self.small_font, up_txt, (150, 255, 150) if self.current_node.parent else (100, 100, 100)),
+            (150, 555))
+
+        child_txt = f"1-{min(len(children), 9)} or LEFT/RIGHT + ENTER = Go to child" if children else "(No children)"
+        self.screen.blit(render_text(self.small_font, child_txt, (255, 200, 150) if children else (100, 100, 100)),
+                         (450, 555))
+        self.screen.blit(render_text(self.small_font, "ESC = Close window", (200, 200, 200)), (750, 555))
+
     def run(self):
+        """Redraw only when the current node or selected child changes, or the window needs repainting."""
         clock = pygame.time.Clock()
+        drawn = None
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT: return
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    drawn = None
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_UP:
                         self.move_to_parent()
                     elif event.key == pygame.K_ESCAPE:
                         return
-                    elif pygame.K_1 <= event.key <= pygame.K_5:
+                    elif pygame.K_1 <= event.key <= pygame.K_9:
                         self.move_to_child(event.key - pygame.K_1)
+                    elif event.key == pygame.K_LEFT:
+                        self.select(-1)
+                    elif event.key == pygame.K_RIGHT:
+                        self.select(1)
+                    elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                        self.move_to_child(self.selected)
 
-            self.screen.fill((25, 25, 25))
-
-            board_x, board_y = 50, 100
-            self.draw_board(self.current_node.board, board_x, board_y, 200)
-            self.screen.blit(self.font.render("CURRENT NODE", True, (255, 255, 255)), (board_x + 40, 60))
-
-            info_x, info_y = board_x + 220, board_y + 20
-            p_name = 'RED' if self.current_node.player == RED else 'YELLOW'
-            strategy = "(Maximizing)" if self.current_node.player == RED else "(Minimizing)"
-            p_color = (255, 100, 100) if self.current_node.player == RED else (255, 215, 0)
-
-            self.screen.blit(self.font.render(f"Depth: {self.current_node.depth}", True, (200, 200, 200)),
-                             (info_x, info_y))
-            self.screen.blit(self.font.render(f"Player: {p_name}", True, p_color), (info_x, info_y + 30))
-            self.screen.blit(self.small_font.render(strategy, True, (150, 150, 150)), (info_x + 140, info_y + 35))
-
-            score = self.current_node.score
-            eval_color = (200, 200, 200)
-            if (self.current_node.player == RED and score > 0) or (self.current_node.player == YELLOW and score < 0):
-                eval_color = (100, 255, 100)
-            elif (self.current_node.player == RED and score < 0) or (self.current_node.player == YELLOW and score > 0):
-                eval_color = (255, 100, 100)
-
-            self.screen.blit(self.font.render(f"Evaluation: {score}", True, eval_color), (info_x, info_y + 60))
-            status_text = "Leaf Node" if self.current_node.is_terminal else "Child Node"
-            self.screen.blit(self.font.render(f"Status: {status_text}", True, (100, 200, 255)), (info_x, info_y + 90))
-
-            if self.current_node.parent:
-                px, py = board_x + 600, board_y
-                self.screen.blit(self.font.render("PARENT", True, (100, 150, 255)), (px + 60, py - 25))
-                self.draw_board(self.current_node.parent.board, px, py, 150)
-                draw_arrow(self.screen, (100, 150, 255), (px - 50, py - 20), (board_x + 200, board_y - 30), 4)
-                self.screen.blit(
-                    self.small_font.render(f"Eval: {self.current_node.parent.score}", True, (100, 255, 100)),
-                    (px + 160, py + 60))
-
-            children = self.current_node.load_children()
-            if children:
-                cy = board_y + 250
-                self.screen.blit(self.font.render("CHILDREN", True, (255, 150, 100)), (50, cy - 30))
-                num_c = len(children)
-                total_w = min(num_c * 160, 900)
-                start_x = (1000 - total_w) // 2
-                spacing = total_w // max(num_c, 1)
-
-                for i, child in enumerate(children):
-                    cx, c_y = start_x + i * spacing + 40, cy + 40
-                    self.draw_board(child.board, cx, c_y, 110)
-                    draw_arrow(self.screen, (255, 150, 100), (board_x + 100, board_y + 165), (cx + 25, c_y - 55), 3)
-
-                    self.screen.blit(self.font.render(f"Col {child.move_col + 1}", True, (255, 255, 255)),
-                                     (cx + 25, c_y - 50))
-                    self.screen.blit(self.small_font.render(f"Press {i + 1}", True, (150, 150, 255)),
-                                     (cx + 25, c_y - 25))
-                    self.screen.blit(self.small_font.render(f"Eval: {child.score}", True, (255, 255, 255)),
-                                     (cx + 10, c_y + 120))
-
-            pygame.draw.rect(self.screen, (40, 40, 40), (0, 540, 1000, 60))
-            pygame.draw.line(self.screen, (100, 100, 100), (0, 540), (1000, 540), 2)
-            self.screen.blit(self.font.render("CONTROLS:", True, (255, 255, 255)), (20, 550))
-
-            up_txt = "UP ARROW = Go to parent" if self.current_node.parent else "UP ARROW = (No parent)"
-            self.screen.blit(
-                self.small_font.render(up_txt, True, (150, 255, 150) if self.current_node.parent else (100, 100, 100)),
-                (150, 555))
-
-            child_txt = f"Press 1-{len(children)} = Go to child" if children else "(No children)"
-            self.screen.blit(self.small_font.render(child_txt, True, (255, 200, 150) if children else (100, 100, 100)),
-                             (450, 555))
-            self.screen.blit(self.small_font.render("ESC = Close window", True, (200, 200, 200)), (750, 555))
-
-            pygame.display.update()
-            clock.tick(60)
\ No newline at end of file
+            if (self.current_node, self.selected) != drawn:
+                self.draw()
+                pygame.display.update()
+                drawn = (self.current_node, self.selected)
+            clock.tick(60)
@@ -0,0 +1,216 @@
+"""
+Persistent transposition cache.
+
+Deep search results (position hash, depth, bound, score, best move) are
+kept in a binary file so a new process starts with the expensive early
+moves already searched. The file is opened with mmap and probed in place,
+so opening it costs the same whatever its size. New results are collected
+in memory and appended by flush() to a journal next to it, so a flush
+costs only what it writes. Once the journal holds MERGE_ENTRIES results
+it is merged into the sorted file, the only step that rewrites it.
+
+Both files start with a fingerprint of EVAL_VERSION and the evaluation
+weights. Files written under a different fingerprint are ignored and
+replaced on the next flush, so changing the evaluator invalidates them.
+"""
+import mmap
+import os
+import random
+import struct
+import zlib
+from transposition import DEPTH_KEYS, NO_MOVE
+from utility import EVAL_VERSION, WEIGHT_THREE, WEIGHT_TWO, WEIGHT_ONE, WEIGHT_OPPONENT_THREE
+
+MAGIC = b"C4TT"
+# 2: keys include the side to move; 3: journal file
+VERSION = 3
+# magic, format version, evaluation fingerprint, entry count (unused in the journal)
+HEADER = struct.Struct("<4sHxxIQ")
+KEY = struct.Struct("<Q")
+# depth, flag, move, value
+RECORD = struct.Struct("<BBBxi")
+# Journal entries: key then record
+JOURNAL_ENTRY = struct.Struct("<QBBBxi")
+
+# Entries kept when merging; the deepest win when the file would grow past this
+MAX_ENTRIES = 1 << 20
+# Journal entries that trigger a merge into the sorted file
+MERGE_ENTRIES = 1 << 16
+
+
+def fingerprint():
+    """Checksum of everything that changes search scores."""
+    text = f"{EVAL_VERSION} {WEIGHT_THREE} {WEIGHT_TWO} {WEIGHT_ONE} {WEIGHT_OPPONENT_THREE}"
+    return zlib.crc32(text.encode())
+
+
+def evaluator_salt(name):
+    """Mixed into keys so results of different evaluators share one file without mixing."""
+    return random.Random(f"evaluator {name}").getrandbits(63)
+
+
+class PersistentCache:
+    """
+    On-disk cache file, its journal and the results recorded since the
+    last flush. Keys are Zobrist hash ^ DEPTH_KEYS[depth] ^ salt, like the
+    in-memory transposition table; the file keeps them sorted for binary
+    search, and the journal (small by construction) is read into a dict.
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, merge_entries=MERGE_ENTRIES):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.max_entries = max_entries
+        self.merge_entries = merge_entries
+        self.fingerprint = fingerprint()
+        self.pending = {}
+        self.journal = {}
+        self.map = None
+        self.count = 0
+        self.hits = 0
+        self._open()
+
+    def _header_ok(self, data):
+        if len(data) < HEADER.size:
+            return False
+        magic, version, file_fingerprint, _ = HEADER.unpack_from(data, 0)
+        return magic == MAGIC and version == VERSION and file_fingerprint == self.fingerprint
+
+    def _open(self):
+        if self.map is not None:
+            self.map.close()
+        self.map, self.count = None, 0
+        self.journal = self._read_journal(self.journal_path)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            return
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if not self._header_ok(self.map):
+            # Written by another evaluator version: ignore it, the next merge replaces it
+            self.map.close()
+            self.map = None
+            return
+        self.count = HEADER.unpack_from(self.map, 0)[3]
+        self.records_at = HEADER.size + KEY.size * self.count
+
+    def _read_journal(self, path):
+        """{key: record} of a journal file; empty if it is missing or from another version."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        if not self._header_ok(data):
+            return {}
+        # A flush cut short leaves a partial entry at the end; skip it
+        end = HEADER.size + (len(data) - HEADER.size) // JOURNAL_ENTRY.size * JOURNAL_ENTRY.size
+        return {entry[0]: entry[1:] for entry in JOURNAL_ENTRY.iter_unpack(data[HEADER.size:end])}
+
+    def __len__(self):
+        return self.count + len(self.journal) + len(self.pending)
+
+    def _find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = KEY.unpack_from(self.map, HEADER.size + KEY.size * mid)[0]
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def probe(self, position_hash, depth, salt=0):
+        """Return (flag, value, move) like TranspositionTable.probe, or None."""
+        key = position_hash ^ DEPTH_KEYS[depth] ^ salt
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.journal.get(key)
+        if entry is None and self.map is not None:
+            i = self._find(key)
+            if i >= 0:
+                entry = RECORD.unpack_from(self.map, self.records_at + RECORD.size * i)
+        if entry is None or entry[0] != depth:
+            return None
+        self.hits += 1
+        _, flag, move, value = entry
+        return flag, value, None if move == NO_MOVE else move
+
+    def record(self, position_hash, depth, flag, value, move, salt=0):
+        """Remember a search result until the next flush."""
+        key = position_hash ^ DEPTH_KEYS[depth] ^ salt
+        self.pending[key] = (depth, flag, NO_MOVE if move is None else move, value)
+
+    def flush(self):
+        """Append recorded results to the journal, merging it into the file once it is large."""
+        if not self.pending:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = b"".join(JOURNAL_ENTRY.pack(key, *record) for key, record in self.pending.items())
+        try:
+            with open(self.journal_path, "rb") as f:
+                fresh = not self._header_ok(f.read(HEADER.size))
+        except FileNotFoundError:
+            fresh = True
+        if fresh:
+            data = HEADER.pack(MAGIC, VERSION, self.fingerprint, 0) + data
+        # One append per flush, so journals written by several processes interleave whole flushes
+        with open(self.journal_path, "wb" if fresh else "ab") as f:
+            f.write(data)
+            size = f.tell()
+        self.journal.update(self.pending)
+        self.pending.clear()
+        if (size - HEADER.size) // JOURNAL_ENTRY.size >= self.merge_entries:
+            self.merge()
+
+    def merge(self):
+        """Merge the journal into the sorted file, replacing it atomically."""
+        # Take the journal out of the way first; flushes from now on start a new one
+        taken = f"{self.journal_path}.{os.getpid()}.merging"
+        try:
+            os.replace(self.journal_path, taken)
+        except FileNotFoundError:
+            return
+        entries = self._entries()
+        entries.update(self._read_journal(taken))
+        entries.update(self.pending)
+        keys = sorted(entries)
+        if len(keys) > self.max_entries:
+            keys = sorted(sorted(keys, key=lambda key: entries[key][0], reverse=True)[:self.max_entries])
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.fingerprint, len(keys)))
+            f.write(struct.pack(f"<{len(keys)}Q", *keys))
+            f.write(b"".join(RECORD.pack(*entries[key]) for key in keys))
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        os.replace(tmp_path, self.path)
+        os.remove(taken)
+        self.pending.clear()
+        self._open()
+
+    def _entries(self):
+        """{key: record} of the sorted file as it is on disk now, which another process may have updated."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not self._header_ok(data):
+            return {}
+        count = HEADER.unpack_from(data, 0)[3]
+        records_at = HEADER.size + KEY.size * count
+        keys = struct.unpack_from(f"<{count}Q", data, HEADER.size)
+        return dict(zip(keys, RECORD.iter_unpack(data[records_at:records_at + RECORD.size * count])))
+
+    def close(self):
+        self.flush()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
@@ -1,3 +1,5 @@
+import os
+
 """ Size """
 ROWS = 4
 COLS = 5
@@ -12,6 +14,41 @@ AI_PLAYER1 = 1
 AI_PLAYER2 = -1
 AI_PLAYER1_DEPTH = 8
 AI_PLAYER2_DEPTH = 4
+# Per-move time budgets in milliseconds. When set, the player searches by iterative
+# deepening, up to the depth above, and plays the deepest result finished in time.
+AI_PLAYER1_TIME_MS = None
+AI_PLAYER2_TIME_MS = None
+# Search driver per player, one of minimax.STRATEGIES: "minimax" (alpha-beta), "pvs" or "mtdf",
+# or "mcts" for Monte Carlo tree search with depth * MCTS_ITERATIONS_PER_DEPTH playouts (or the time budget)
+AI_PLAYER1_STRATEGY = "minimax"
+AI_PLAYER2_STRATEGY = "minimax"
+
+""" Parallel search: worker processes for root splitting (None = one per CPU, 1 = off) """
+AI_WORKERS = 1
+
+""" Monte Carlo tree search: playouts per unit of depth when mcts.best_move gets no explicit budget """
+MCTS_ITERATIONS_PER_DEPTH = 1000
+
+""" Perfect-play database consulted by best_move when present (build with: python database.py) """
+PERFECT_PLAY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", f"perfect_{COLS}x{ROWS}.c4db")
+
+""" Evaluation weights for a window of four cells """
+WEIGHT_THREE = 400
+WEIGHT_TWO = 20
+WEIGHT_ONE = 1
+WEIGHT_OPPONENT_THREE = -350
+# Bump whenever evaluation changes in a way the weights above do not show; persisted search results are then discarded
+EVAL_VERSION = 1
+
+""" Transposition table memory cap """
+TT_MEMORY_MB = 16
+
+""" Persistent transposition cache for warm starts (None = off) and the shallowest remaining depth it keeps """
+TT_CACHE_FILE = None
+TT_CACHE_MIN_DEPTH = 5
+
+""" Game records: every finished game is appended to this file (None = off); see game_record.py """
+GAME_RECORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "games.c4g")
 
 def check_direction(board, start_r, start_c, dr, dc, player, rows, cols):
     """Count consecutive pieces in a given direction"""
@@ -21,4 +58,47 @@ def check_direction(board, start_r, start_c, dr, dc, player, rows, cols):
         count += 1
         r += dr
         c += dc
-    return count
\ No newline at end of file
+    return count
+
+
+def window_cells(rows, cols):
+    """Every 4-cell window of a rows x cols board as a tuple of (row, col) cells."""
+    windows = []
+    for r in range(rows):
+        for c in range(cols - 3):
+            windows.append(tuple((r, c + i) for i in range(4)))
+    for c in range(cols):
+        for r in range(rows - 3):
+            windows.append(tuple((r + i, c) for i in range(4)))
+    for r in range(3, rows):
+        for c in range(cols - 3):
+            windows.append(tuple((r - i, c + i) for i in range(4)))
+    for r in range(3, rows):
+        for c in range(3, cols):
+            windows.append(tuple((r - i, c - i) for i in range(4)))
+    return tuple(windows)
+
+
+def center_order(cols):
+    """Columns ordered center-out, left before right on ties: 5 columns give 2, 1, 3, 0, 4."""
+    return sorted(range(cols), key=lambda c: abs(2 * c - (cols - 1)))
+
+
+""" Precomputed windows: horizontal, vertical, then both diagonals """
+WINDOWS = window_cells(ROWS, COLS)
+
+""" Move strings: one character per ply, columns numbered from 1 """
+MOVE_CHARS = "123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def moves_to_string(moves):
+    """Encode 0-based columns as a move string, e.g. [2, 2, 1] -> "332"."""
+    return "".join(MOVE_CHARS[col] for col in moves)
+
+
+def string_to_moves(text):
+    """Decode a move string back to 0-based columns."""
+    try:
+        return [MOVE_CHARS.index(char) for char in text.strip().lower()]
+    except ValueError:
+        raise ValueError(f"invalid move string {text!r}") from None